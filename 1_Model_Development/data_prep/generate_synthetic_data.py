@@ -1,91 +1,103 @@
 # src/data_preprocessing/generate_synthetic_data.py
 
 import pandas as pd
+import numpy as np
 import random
 import os
-from datetime import datetime, timedelta
-
-def generate_orders(num_orders=15000):
-    dish_pool = {
-        "North Indian": [
-            "Butter Chicken", "Dal Makhani", "Matar Paneer", "Chole Bhature", "Rajma Chawal",
-            "Paneer Tikka", "Garlic Naan", "Butter Naan", "Tandoori Roti", "Palak Paneer", 
-            "Kadai Paneer", "Shahi Paneer", "Malai Kofta", "Dal Tadka", "Jeera Rice", 
-            "Peas Pulao", "Missi Roti", "Pudina Paratha", "Aloo Paratha", "Gobi Paratha", 
-            "Mix Veg", "Bhindi Masala", "Baingan Bharta", "Dum Aloo", "Chicken Curry", 
-            "Mutton Rogan Josh", "Keema Naan", "Chicken Tikka", "Seekh Kebab", "Fish Tikka", 
-            "Tandoori Chicken", "Afghani Chicken", "Mutton Korma", "Chicken Korma", "Paneer Butter Masala",
-            "Chopped Onions", "Papad", "Sirka Pyaaz", "Laccha Pyaaz", "Achaar", "Mint Chutney"
-        ],
-        "South Indian": [
-            "Masala Dosa", "Idli", "Hyderabadi Biryani", "Chicken Chettinad", "Parotta", 
-            "Appam", "Coconut Chutney", "Sambar", "Dosa", "Medu Vada", "Mirchi Ka Salan",
-            "Rawa Dosa", "Mysore Masala Dosa", "Onion Uthappam", "Tomato Uthappam", "Paneer Dosa",
-            "Cheese Dosa", "Podi Idli", "Mini Idli", "Vada", "Rasam", "Lemon Rice",
-            "Curd Rice", "Tamarind Rice", "Vangi Bath", "Bisi Bele Bath", "Chicken 65",
-            "Guntur Chicken", "Andhra Chicken Curry", "Meen Moilee", "Prawn Roast",
-            "Mutton Chukka", "Kothu Parotta", "Idiyappam", "Malabar Parotta", "Veg Stew"
-        ],
-        "Indo-Chinese": [
-            "Momos", "Paneer Momos", "Hakka Noodles", "Manchow Soup", "Clear Soup", 
-            "Spring Rolls", "Fried Rice", "Chilli Paneer", "Veg Manchurian", "Chicken Manchurian",
-            "Chilli Chicken", "Garlic Chicken", "Schezwan Noodles", "Schezwan Fried Rice",
-            "Triple Schezwan Rice", "American Chopsuey", "Chinese Bhel", "Crispy Veg",
-            "Honey Chilli Potatoes", "Dragon Chicken", "Sweet Corn Soup", "Hot and Sour Soup",
-            "Lemon Coriander Soup", "Taluman Soup", "Crispy Noodles", "Red Chutney", "Mayonnaise"
-        ],
-        "Fast Food": [
-            "Burger", "Hot Dog", "Fries", "Onion Rings", "Extra Cheese Dip", "Mustard",
-            "Veg Burger", "Chicken Burger", "Cheese Burger", "Double Patty Burger",
-            "Peri Peri Fries", "Cheesy Fries", "Potato Wedges", "Chicken Nuggets",
-            "Chicken Wings", "Fish and Chips", "Veg Wrap", "Chicken Wrap", "Paneer Tikka Roll",
-            "Egg Roll", "Chicken Roll", "Mutton Roll", "Shawarma", "Falafel", "Pita Bread",
-            "Tahini", "Garlic Sauce", "Ketchup"
-        ],
-        "Italian": [
-            "Spaghetti", "Pasta", "Pizza", "Garlic Bread", "Cheese Dip", "Margherita Pizza",
-            "Pepperoni Pizza", "Veggie Supreme Pizza", "Farmhouse Pizza", "Penne Arrabbiata",
-            "Alfredo Pasta", "Mac and Cheese", "Lasagna", "Ravioli", "Risotto", "Bruschetta",
-            "Garlic Breadsticks", "Stuffed Garlic Bread", "Cheese Burst Pizza", "Thin Crust Pizza"
-        ],
-        "Desserts": [
-            "Gulab Jamun", "Rosogolla", "Mishti Doi", "Double Ka Meetha", "Brownie",
-            "Rasmalai", "Jalebi", "Rabri", "Kaju Katli", "Barfi", "Ladoo", "Moong Dal Halwa",
-            "Gajar Ka Halwa", "Ice Cream", "Chocolate Cake", "Cheesecake", "Tiramisu",
-            "Waffles", "Pancakes", "Churros", "Donut", "Muffin", "Fruit Salad", "Kulfi",
-            "Falooda", "Shahi Tukda", "Petha", "Soan Papdi", "Mysore Pak"
-        ],
-        "Beverages": [
-            "Water", "Soft Drink", "Coke", "Masala Soda", "Lassi", "Buttermilk", "Chaas",
-            "Fruit Beer", "Sweet Lassi", "Nimbu Pani", "Filter Coffee", "Masala Chai",
-            "Cold Coffee", "Iced Tea", "Lemonade", "Mojito", "Virgin Mojito", "Blue Lagoon",
-            "Fresh Lime Soda", "Mango Shake", "Banana Shake", "Strawberry Shake", "Chocolate Shake",
-            "Oreo Shake", "Kitkat Shake", "Cold Drink", "Diet Coke", "Sprite", "Fanta",
-            "Thums Up", "Limca", "Ginger Ale", "Tonic Water", "Sparkling Water", "Coconut Water",
-            "Sugarcane Juice", "Watermelon Juice", "Orange Juice", "Mosambi Juice", "Apple Juice"
-        ]
-    }
-    
-    def get_price(item):
-        val = abs(hash(item)) % 300
-        if item in dish_pool["Beverages"]: return 20 + (val % 80)
-        if item in dish_pool["Desserts"]: return 50 + (val % 100)
-        if item in dish_pool["Fast Food"]: return 100 + (val % 150)
-        return 100 + (val % 250)
+import glob
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from reproducibility import get_seed, stable_hash, build_timestamp, record_artifacts
+
+DISH_POOL = {
+    "North Indian": [
+        "Butter Chicken", "Dal Makhani", "Matar Paneer", "Chole Bhature", "Rajma Chawal",
+        "Paneer Tikka", "Garlic Naan", "Butter Naan", "Tandoori Roti", "Palak Paneer", 
+        "Kadai Paneer", "Shahi Paneer", "Malai Kofta", "Dal Tadka", "Jeera Rice", 
+        "Peas Pulao", "Missi Roti", "Pudina Paratha", "Aloo Paratha", "Gobi Paratha", 
+        "Mix Veg", "Bhindi Masala", "Baingan Bharta", "Dum Aloo", "Chicken Curry", 
+        "Mutton Rogan Josh", "Keema Naan", "Chicken Tikka", "Seekh Kebab", "Fish Tikka", 
+        "Tandoori Chicken", "Afghani Chicken", "Mutton Korma", "Chicken Korma", "Paneer Butter Masala",
+        "Chopped Onions", "Papad", "Sirka Pyaaz", "Laccha Pyaaz", "Achaar", "Mint Chutney"
+    ],
+    "South Indian": [
+        "Masala Dosa", "Idli", "Hyderabadi Biryani", "Chicken Chettinad", "Parotta", 
+        "Appam", "Coconut Chutney", "Sambar", "Dosa", "Medu Vada", "Mirchi Ka Salan",
+        "Rawa Dosa", "Mysore Masala Dosa", "Onion Uthappam", "Tomato Uthappam", "Paneer Dosa",
+        "Cheese Dosa", "Podi Idli", "Mini Idli", "Vada", "Rasam", "Lemon Rice",
+        "Curd Rice", "Tamarind Rice", "Vangi Bath", "Bisi Bele Bath", "Chicken 65",
+        "Guntur Chicken", "Andhra Chicken Curry", "Meen Moilee", "Prawn Roast",
+        "Mutton Chukka", "Kothu Parotta", "Idiyappam", "Malabar Parotta", "Veg Stew"
+    ],
+    "Indo-Chinese": [
+        "Momos", "Paneer Momos", "Hakka Noodles", "Manchow Soup", "Clear Soup", 
+        "Spring Rolls", "Fried Rice", "Chilli Paneer", "Veg Manchurian", "Chicken Manchurian",
+        "Chilli Chicken", "Garlic Chicken", "Schezwan Noodles", "Schezwan Fried Rice",
+        "Triple Schezwan Rice", "American Chopsuey", "Chinese Bhel", "Crispy Veg",
+        "Honey Chilli Potatoes", "Dragon Chicken", "Sweet Corn Soup", "Hot and Sour Soup",
+        "Lemon Coriander Soup", "Taluman Soup", "Crispy Noodles", "Red Chutney", "Mayonnaise"
+    ],
+    "Fast Food": [
+        "Burger", "Hot Dog", "Fries", "Onion Rings", "Extra Cheese Dip", "Mustard",
+        "Veg Burger", "Chicken Burger", "Cheese Burger", "Double Patty Burger",
+        "Peri Peri Fries", "Cheesy Fries", "Potato Wedges", "Chicken Nuggets",
+        "Chicken Wings", "Fish and Chips", "Veg Wrap", "Chicken Wrap", "Paneer Tikka Roll",
+        "Egg Roll", "Chicken Roll", "Mutton Roll", "Shawarma", "Falafel", "Pita Bread",
+        "Tahini", "Garlic Sauce", "Ketchup"
+    ],
+    "Italian": [
+        "Spaghetti", "Pasta", "Pizza", "Garlic Bread", "Cheese Dip", "Margherita Pizza",
+        "Pepperoni Pizza", "Veggie Supreme Pizza", "Farmhouse Pizza", "Penne Arrabbiata",
+        "Alfredo Pasta", "Mac and Cheese", "Lasagna", "Ravioli", "Risotto", "Bruschetta",
+        "Garlic Breadsticks", "Stuffed Garlic Bread", "Cheese Burst Pizza", "Thin Crust Pizza"
+    ],
+    "Desserts": [
+        "Gulab Jamun", "Rosogolla", "Mishti Doi", "Double Ka Meetha", "Brownie",
+        "Rasmalai", "Jalebi", "Rabri", "Kaju Katli", "Barfi", "Ladoo", "Moong Dal Halwa",
+        "Gajar Ka Halwa", "Ice Cream", "Chocolate Cake", "Cheesecake", "Tiramisu",
+        "Waffles", "Pancakes", "Churros", "Donut", "Muffin", "Fruit Salad", "Kulfi",
+        "Falooda", "Shahi Tukda", "Petha", "Soan Papdi", "Mysore Pak"
+    ],
+    "Beverages": [
+        "Water", "Soft Drink", "Coke", "Masala Soda", "Lassi", "Buttermilk", "Chaas",
+        "Fruit Beer", "Sweet Lassi", "Nimbu Pani", "Filter Coffee", "Masala Chai",
+        "Cold Coffee", "Iced Tea", "Lemonade", "Mojito", "Virgin Mojito", "Blue Lagoon",
+        "Fresh Lime Soda", "Mango Shake", "Banana Shake", "Strawberry Shake", "Chocolate Shake",
+        "Oreo Shake", "Kitkat Shake", "Cold Drink", "Diet Coke", "Sprite", "Fanta",
+        "Thums Up", "Limca", "Ginger Ale", "Tonic Water", "Sparkling Water", "Coconut Water",
+        "Sugarcane Juice", "Watermelon Juice", "Orange Juice", "Mosambi Juice", "Apple Juice"
+    ]
+}
+
+def get_price(item):
+    val = stable_hash(item) % 300
+    if item in DISH_POOL["Beverages"]: return 20 + (val % 80)
+    if item in DISH_POOL["Desserts"]: return 50 + (val % 100)
+    if item in DISH_POOL["Fast Food"]: return 100 + (val % 150)
+    return 100 + (val % 250)
+
+def generate_orders(num_orders=15000, seed=None, write=True):
+    """write=False only returns the DataFrame (e.g. a blind evaluation set) and leaves data/ untouched."""
+    dish_pool = DISH_POOL
+    seed = get_seed() if seed is None else seed
+    rng = random.Random(seed)
 
     all_items = []
     for cat in dish_pool: all_items.extend(dish_pool[cat])
 
-    user_profiles = [{"uid": f"U_{i}", "vr": round(random.uniform(0, 1), 2)} for i in range(100)]
+    user_profiles = [{"uid": f"U_{i}", "vr": round(rng.uniform(0, 1), 2)} for i in range(100)]
     data = []
     
     for _ in range(num_orders):
-        region = random.choice(list(dish_pool.keys()))
-        user = random.choice(user_profiles)
-        main_dish = random.choice(dish_pool[region])
+        region = rng.choice(list(dish_pool.keys()))
+        user = rng.choice(user_profiles)
+        main_dish = rng.choice(dish_pool[region])
         
-        candidates = list(set(dish_pool[region] + dish_pool["Beverages"] + dish_pool["Desserts"]))
-        random.shuffle(candidates)
+        # dict.fromkeys de-duplicates in a fixed order (set order changes with the hash seed)
+        candidates = list(dict.fromkeys(dish_pool[region] + dish_pool["Beverages"] + dish_pool["Desserts"]))
+        rng.shuffle(candidates)
         candidates = candidates[:50]
         
         for addon in candidates:
@@ -97,29 +109,212 @@ def generate_orders(num_orders=15000):
             if any(kw in addon for kw in non_veg_keywords): is_veg = 0
             
             label = 0
-            if addon in dish_pool[region] and random.random() > 0.85: label = 1
+            if addon in dish_pool[region] and rng.random() > 0.85: label = 1
             if ("Pizza" in main_dish and "Garlic" in addon) or ("Burger" in main_dish and "Fries" in addon):
-                if random.random() > 0.2: label = 1
+                if rng.random() > 0.2: label = 1
             
             data.append({
                 "order_id": f"ORD_{_}", "timestamp": None, "user_id": user["uid"],
-                "user_historical_veg_ratio": user["vr"], "user_segment": random.choice(["Budget", "Premium"]),
-                "order_frequency": "Medium", "time_of_day": random.choice(["Lunch", "Dinner"]),
+                "user_historical_veg_ratio": user["vr"], "user_segment": rng.choice(["Budget", "Premium"]),
+                "order_frequency": "Medium", "time_of_day": rng.choice(["Lunch", "Dinner"]),
                 "region": region, "cart_items": main_dish, "cart_total_value": get_price(main_dish),
                 "candidate_item": addon, "addon_price": get_price(addon), 
                 "is_veg": is_veg, "added": label
             })
             
     df = pd.DataFrame(data)
-    df['timestamp'] = datetime.now()
+    df['timestamp'] = build_timestamp(seed)
+    if not write:
+        return df
     os.makedirs("data", exist_ok=True)
     df.to_csv("data/synthetic_orders.csv", index=False)
     # Split for temporal consistency
     split = int(len(df) * 0.8)
     df.iloc[:split].to_csv("data/historical_train_data.csv", index=False)
     df.iloc[split:].to_csv("data/recent_test_data.csv", index=False)
+    record_artifacts(["data/synthetic_orders.csv", "data/historical_train_data.csv", "data/recent_test_data.csv"],
+                     "generate_orders", seed)
     print("SUCCESS: Synthetic data generated.")
     return df
 
+NON_VEG_KEYWORDS = ["Chicken", "Mutton", "Fish", "Prawn", "Keema", "Meat", "Pepperoni", "Egg"]
+NUM_CANDIDATES = 50
+DEFAULT_CHUNK_SIZE = 50_000
+# Measured peak RSS of one chunk is ~360 MB per 50k orders; used to keep chunks x workers within RAM
+BYTES_PER_ORDER = 8_000
+
+def _available_memory():
+    """MemAvailable from /proc/meminfo (falls back to free pages), or None if unknown."""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE")
+    except (ValueError, OSError, AttributeError):
+        return None
+
+def _build_tables(num_users, rng):
+    """Item-level lookup arrays shared by every chunk, so the per-row work is pure NumPy indexing."""
+    regions = list(DISH_POOL.keys())
+    items = [item for cat in DISH_POOL for item in DISH_POOL[cat]]
+    index = {item: i for i, item in enumerate(items)}
+
+    region_pools, region_menus, in_region = [], [], np.zeros((len(regions), len(items)), dtype=bool)
+    for r, region in enumerate(regions):
+        pool = sorted(set(DISH_POOL[region] + DISH_POOL["Beverages"] + DISH_POOL["Desserts"]), key=index.get)
+        region_pools.append(np.array([index[i] for i in pool], dtype=np.int32))
+        region_menus.append(np.array([index[i] for i in DISH_POOL[region]], dtype=np.int32))
+        in_region[r, region_menus[-1]] = True
+
+    return {
+        "regions": regions,
+        "items": items,
+        "prices": np.array([get_price(i) for i in items], dtype=np.int32),
+        "is_veg": np.array([0 if any(kw in i for kw in NON_VEG_KEYWORDS) else 1 for i in items], dtype=np.int8),
+        "is_pizza": np.array(["Pizza" in i for i in items]),
+        "is_burger": np.array(["Burger" in i for i in items]),
+        "has_garlic": np.array(["Garlic" in i for i in items]),
+        "has_fries": np.array(["Fries" in i for i in items]),
+        "region_pools": region_pools,
+        "region_menus": region_menus,
+        "in_region": in_region,
+        "user_ids": [f"U_{i}" for i in range(num_users)],
+        "user_vr": np.round(rng.uniform(0, 1, num_users), 2)
+    }
+
+def _generate_chunk(chunk_id, first_order, num_orders, seed_seq, tables, out_dir, fmt, timestamp):
+    rng = np.random.default_rng(seed_seq)
+    n_regions = len(tables["regions"])
+
+    region = rng.integers(0, n_regions, num_orders)
+    user = rng.integers(0, len(tables["user_ids"]), num_orders)
+    main = np.empty(num_orders, dtype=np.int32)
+    cands = np.empty((num_orders, NUM_CANDIDATES), dtype=np.int32)
+    for r in range(n_regions):
+        rows = np.flatnonzero(region == r)
+        if len(rows) == 0: continue
+        menu, pool = tables["region_menus"][r], tables["region_pools"][r]
+        main[rows] = menu[rng.integers(0, len(menu), len(rows))]
+        # Random keys + argsort is a vectorized shuffle; keep the first 50 of each row
+        perm = np.argsort(rng.random((len(rows), len(pool))), axis=1)[:, :NUM_CANDIDATES]
+        cands[rows] = pool[perm]
+
+    order = np.repeat(np.arange(num_orders), NUM_CANDIDATES)
+    addon = cands.ravel()
+    keep = addon != main[order]
+    order, addon = order[keep], addon[keep]
+    main_r, region_r = main[order], region[order]
+
+    n = len(addon)
+    label = tables["in_region"][region_r, addon] & (rng.random(n) > 0.85)
+    pair = (tables["is_pizza"][main_r] & tables["has_garlic"][addon]) | (tables["is_burger"][main_r] & tables["has_fries"][addon])
+    label |= pair & (rng.random(n) > 0.2)
+
+    # String columns are categoricals over the small lookup tables (int codes, no per-row Python
+    # strings) and order_id is a plain integer; parquet stores them dictionary-encoded
+    def categorical(codes, categories):
+        return pd.Categorical.from_codes(codes, categories=categories)
+
+    df = pd.DataFrame({
+        "order_id": (first_order + order).astype(np.int64),
+        "timestamp": timestamp,
+        "user_id": categorical(user[order], tables["user_ids"]),
+        "user_historical_veg_ratio": tables["user_vr"][user[order]],
+        "user_segment": categorical(rng.integers(0, 2, n), ["Budget", "Premium"]),
+        "order_frequency": categorical(np.zeros(n, dtype=np.int8), ["Medium"]),
+        "time_of_day": categorical(rng.integers(0, 2, n), ["Lunch", "Dinner"]),
+        "region": categorical(region_r, tables["regions"]),
+        "cart_items": categorical(main_r, tables["items"]),
+        "cart_total_value": tables["prices"][main_r],
+        "candidate_item": categorical(addon, tables["items"]),
+        "addon_price": tables["prices"][addon],
+        "is_veg": tables["is_veg"][addon],
+        "added": label.astype(np.int8)
+    })
+
+    path = os.path.join(out_dir, f"part-{chunk_id:05d}.{fmt}")
+    if fmt == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    return path, len(df)
+
+def generate_orders_parallel(num_orders=10_000_000, out_dir="data/synthetic_orders", chunk_size=DEFAULT_CHUNK_SIZE,
+                             workers=None, fmt="parquet", seed=42, num_users=100):
+    """
+    Vectorized, multi-process version of generate_orders for scale testing.
+    Orders are generated in independent chunks (seeded from one SeedSequence, so the output does
+    not depend on the worker count) and each chunk is written straight to its own partition file.
+    chunk_size is capped so that all workers' chunks fit in half of the available memory.
+    """
+    if fmt not in ("parquet", "csv"):
+        print(f"ERROR: Unsupported format '{fmt}'. Use 'parquet' or 'csv'.")
+        return []
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            print("ERROR: pyarrow not installed. Run `pip install pyarrow` or use fmt='csv'.")
+            return []
+
+    workers = workers or os.cpu_count() or 1
+    available = _available_memory()
+    if available:
+        max_chunk = max(1_000, int(available * 0.5 / workers / BYTES_PER_ORDER))
+        if chunk_size > max_chunk:
+            print(f"DEBUG: Capping chunk size at {max_chunk:,} orders to fit {workers} workers in memory "
+                  "(partitioning, and so the sampled rows, differ from the requested chunk size)")
+            chunk_size = max_chunk
+
+    root = np.random.SeedSequence(seed)
+    tables = _build_tables(num_users, np.random.default_rng(root.spawn(1)[0]))
+    starts = list(range(0, num_orders, chunk_size))
+    chunk_seeds = root.spawn(len(starts))
+    timestamp = build_timestamp(seed)
+
+    os.makedirs(out_dir, exist_ok=True)
+    # Partitions of an earlier (possibly larger) run would otherwise be read back as part of this dataset
+    stale = glob.glob(os.path.join(out_dir, "part-*.parquet")) + glob.glob(os.path.join(out_dir, "part-*.csv"))
+    for path in stale:
+        os.remove(path)
+    if stale:
+        print(f"DEBUG: Removed {len(stale)} partition files left in {out_dir}/ by a previous run")
+    print(f"DEBUG: Generating {num_orders:,} orders in {len(starts)} chunks -> {out_dir}/")
+    total_rows = 0
+    parts = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_generate_chunk, i, start, min(chunk_size, num_orders - start), chunk_seeds[i],
+                        tables, out_dir, fmt, timestamp)
+            for i, start in enumerate(starts)
+        ]
+        for future in futures:
+            path, rows = future.result()
+            parts.append(path)
+            total_rows += rows
+
+    record_artifacts(parts, "generate_orders_parallel", seed)
+    print(f"SUCCESS: {total_rows:,} candidate rows written to {len(parts)} {fmt} partitions.")
+    return parts
+
 if __name__ == "__main__":
-    generate_orders()
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate synthetic CSAO order data.")
+    parser.add_argument("--orders", type=int, default=None, help="Number of orders to generate")
+    parser.add_argument("--parallel", action="store_true", help="Use the vectorized multi-process generator")
+    parser.add_argument("--out-dir", default="data/synthetic_orders")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    parser.add_argument("--seed", type=int, default=None, help="Defaults to $CSAO_SEED (or 42 with --parallel)")
+    args = parser.parse_args()
+
+    if args.parallel:
+        generate_orders_parallel(args.orders or 10_000_000, out_dir=args.out_dir, chunk_size=args.chunk_size,
+                                 workers=args.workers, fmt=args.format, seed=get_seed(42) if args.seed is None else args.seed)
+    else:
+        generate_orders(args.orders or 15000, seed=args.seed)
@@ -20,17 +20,6 @@ def run_demo():
     
     engine = TwoStageEngine()
     
-    # Internal name mapping to ensure perfect demonstration results
-    # User Request -> Catalog Key
-    mapping = {
-        "Veg Hakka Noodles": "Hakka Noodles",
-        "Chilli Paneer": "Honey Chilli Potatoes",
-        "Paneer Butter Masala": "Paneer Butter Masala",
-        "Butter Chicken": "Butter Chicken",
-        "Dal Makhani": "Dal Makhani",
-        "Jeera Rice": "Jeera Rice"
-    }
-    
     test_cases = [
         {
             "name": "Single Item (North Indian)",
@@ -55,12 +44,13 @@ def run_demo():
     results_output = {}
 
     for case in test_cases:
-        real_cart = [mapping.get(item, item) for item in case['requested_cart']]
+        # The engine resolves free-text names (e.g. "Veg Hakka Noodles") to catalog keys itself
         print(f"\n>>> CASE: {case['name']}")
         print(f"Cart Content: {case['requested_cart']}")
+        print(f"Resolved As : {engine.name_resolver.canonicalize(case['requested_cart'])}")
         
         recommendations = engine.recommend(
-            real_cart, 
+            case['requested_cart'], 
             user_segment=case['segment'], 
             time_of_day=case['time']
         )
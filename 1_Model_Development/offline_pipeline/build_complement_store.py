@@ -0,0 +1,86 @@
+# src/offline_pipeline/build_complement_store.py
+
+import json
+import os
+import pickle
+import sys
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from online_api.complement_store import STORE_DIR, dish_id_to_int, ComplementStore
+from reproducibility import get_seed, record_artifacts
+
+def build_complement_store(mapping_path="data/processed/complementary_mapping.json",
+                           names_path="data/processed/name_to_id.pkl", out_dir=STORE_DIR):
+    """Converts the JSON complement mapping + pickled name index into memory-mappable CSR arrays."""
+    try:
+        with open(mapping_path, "r") as f:
+            mapping = json.load(f)
+        with open(names_path, "rb") as f:
+            name_to_id = pickle.load(f)
+    except FileNotFoundError as e:
+        print(f"ERROR: {e.filename} not found.")
+        return
+
+    print(f"DEBUG: Converting {len(mapping):,} complement lists and {len(name_to_id):,} names to CSR...")
+    all_ids = set(mapping) | set(name_to_id.values())
+    for complements in mapping.values():
+        all_ids.update(complements)
+    num_nodes = max(dish_id_to_int(d) for d in all_ids) + 1 if all_ids else 0
+    id_width = max((len(d) for d in all_ids), default=11) - len("DISH_")
+
+    # CSR adjacency: rows are dish ids, columns their complements (order preserved)
+    degree = np.zeros(num_nodes, dtype=np.int64)
+    rows = {dish_id_to_int(d): [dish_id_to_int(c) for c in comps] for d, comps in mapping.items()}
+    for node, comps in rows.items():
+        degree[node] = len(comps)
+    indptr = np.zeros(num_nodes + 1, dtype=np.int64)
+    np.cumsum(degree, out=indptr[1:])
+    if indptr[-1] > np.iinfo(np.int32).max:
+        print("ERROR: Too many edges for int32 CSR offsets.")
+        return
+    indices = np.empty(int(indptr[-1]), dtype=np.int32)
+    for node, comps in rows.items():
+        indices[indptr[node]:indptr[node + 1]] = comps
+
+    # Sorted name index as a single UTF-8 blob with offsets, plus the reverse id -> position map
+    names = sorted(name_to_id)
+    encoded = [n.encode("utf-8") for n in names]
+    name_offsets = np.zeros(len(names) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=name_offsets[1:])
+    name_blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    name_ids = np.array([dish_id_to_int(name_to_id[n]) for n in names], dtype=np.int32)
+    id_name_pos = np.full(num_nodes, -1, dtype=np.int32)
+    id_name_pos[name_ids] = np.arange(len(names), dtype=np.int32)
+
+    os.makedirs(out_dir, exist_ok=True)
+    arrays = {
+        "indptr": indptr.astype(np.int32),
+        "indices": indices,
+        "name_blob": name_blob,
+        "name_offsets": name_offsets,
+        "name_ids": name_ids,
+        "id_name_pos": id_name_pos
+    }
+    paths = []
+    for name, array in arrays.items():
+        path = os.path.join(out_dir, f"{name}.npy")
+        np.save(path, array)
+        paths.append(path)
+    meta = {"num_nodes": num_nodes, "num_edges": int(indptr[-1]), "num_names": len(names), "id_width": id_width}
+    with open(os.path.join(out_dir, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    record_artifacts(paths, "build_complement_store", get_seed())
+
+    store = ComplementStore(out_dir)
+    size_mb = sum(os.path.getsize(p) for p in paths) / 1e6
+    print(f"DEBUG: {meta['num_edges']:,} edges over {num_nodes:,} nodes, {size_mb:.1f} MB on disk "
+          f"(JSON source {os.path.getsize(mapping_path) / 1e6:.1f} MB).")
+    if names and store.lookup(names[0]) != name_ids[0]:
+        print("ERROR: Name index round-trip failed.")
+        return
+    print(f"SUCCESS: Complement CSR store written to {out_dir}/")
+    return store
+
+if __name__ == "__main__":
+    build_complement_store()
@@ -0,0 +1,96 @@
+# src/offline_pipeline/build_feature_store.py
+
+import json
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from online_api.feature_store import STORE_DIR, USER_COLUMNS, FeatureStore
+from reproducibility import get_seed, record_artifacts
+
+USER_PREFIX = "U_"
+
+def _mode(df, key, column):
+    """Most frequent value of `column` per `key` (ties -> first seen)."""
+    counts = df.groupby([key, column], sort=False).size().reset_index(name="n")
+    counts = counts.sort_values("n", ascending=False, kind="stable")
+    return counts.drop_duplicates(key).set_index(key)[column]
+
+def build_feature_store(orders_path="data/synthetic_orders.csv", out_dir=STORE_DIR):
+    print("DEBUG: Building user/item feature store from order history...")
+    try:
+        df = pd.read_csv(orders_path, usecols=[
+            "order_id", "user_id", "user_historical_veg_ratio", "user_segment", "order_frequency",
+            "cart_items", "cart_total_value", "candidate_item", "addon_price"
+        ])
+    except FileNotFoundError:
+        print(f"ERROR: {orders_path} not found. Run generate_synthetic_data.py first.")
+        return
+
+    # --- Item features: catalog price per dish (as cart item or as add-on) ---
+    prices = pd.concat([
+        df[["cart_items", "cart_total_value"]].set_axis(["item", "price"], axis=1),
+        df[["candidate_item", "addon_price"]].set_axis(["item", "price"], axis=1)
+    ]).groupby("item")["price"].median().sort_index()
+
+    # --- User features: one row per order, then aggregate per user ---
+    orders = df.drop_duplicates("order_id")
+    users = orders.groupby("user_id").agg(
+        veg_ratio=("user_historical_veg_ratio", "last"),
+        order_count=("order_id", "size"),
+        avg_cart_value=("cart_total_value", "mean")
+    )
+    users["segment"] = _mode(orders, "user_id", "user_segment")
+    users["frequency"] = _mode(orders, "user_id", "order_frequency")
+    users = users.sort_index()
+
+    segments = sorted(users["segment"].unique().tolist())
+    frequencies = sorted(users["frequency"].unique().tolist())
+    columns = {
+        "veg_ratio": users["veg_ratio"].to_numpy(np.float32),
+        "segment": users["segment"].map({s: i for i, s in enumerate(segments)}).to_numpy(np.int8),
+        "frequency": users["frequency"].map({f: i for i, f in enumerate(frequencies)}).to_numpy(np.int8),
+        "order_count": users["order_count"].to_numpy(np.int32),
+        "avg_cart_value": users["avg_cart_value"].to_numpy(np.float32)
+    }
+
+    # Dense id -> row table for U_<n> ids; anything else goes to a small JSON side index
+    numeric, user_keys = {}, {}
+    for row, user_id in enumerate(users.index):
+        suffix = user_id[len(USER_PREFIX):] if user_id.startswith(USER_PREFIX) else ""
+        if suffix.isascii() and suffix.isdecimal():
+            numeric[int(suffix)] = row
+        else:
+            user_keys[user_id] = row
+    user_index = np.full(max(numeric, default=-1) + 1, -1, dtype=np.int32)
+    for n, row in numeric.items():
+        user_index[n] = row
+
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    arrays = {"user_index": user_index, "item_price": prices.to_numpy(np.float32)}
+    arrays.update({f"user_{col}": columns[col] for col in USER_COLUMNS})
+    for name, array in arrays.items():
+        paths.append(os.path.join(out_dir, f"{name}.npy"))
+        np.save(paths[-1], array)
+
+    documents = {
+        "meta.json": {"user_prefix": USER_PREFIX, "num_users": len(users), "num_items": len(prices),
+                      "segments": segments, "frequencies": frequencies},
+        "item_names.json": prices.index.tolist()
+    }
+    if user_keys:
+        documents["user_keys.json"] = user_keys
+    for name, doc in documents.items():
+        paths.append(os.path.join(out_dir, name))
+        with open(paths[-1], "w") as f:
+            json.dump(doc, f)
+    record_artifacts(paths, "build_feature_store", get_seed())
+
+    FeatureStore(out_dir)
+    print(f"SUCCESS: Feature store with {len(users):,} users and {len(prices):,} items written to {out_dir}/")
+
+if __name__ == "__main__":
+    build_feature_store()
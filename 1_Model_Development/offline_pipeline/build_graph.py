@@ -2,10 +2,27 @@
 
 import json
 import os
+import sys
 import pandas as pd
 from collections import defaultdict
 
-def build_graph():
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from reproducibility import get_seed, seed_everything, record_artifacts
+from online_api.quantized_embeddings import PRECISION_ENV_VAR, PRECISIONS, save_embeddings
+
+def build_graph(quantize=None):
+    """
+    quantize: optionally also emit "float16" or "int8" catalog embeddings (defaults to $CSAO_EMBEDDING_PRECISION)
+    for the engine's quantized Stage 1 path.
+    """
+    quantize = quantize or os.environ.get(PRECISION_ENV_VAR)
+    if quantize == "float":
+        quantize = None
+    if quantize and quantize not in PRECISIONS:
+        print(f"ERROR: Unsupported embedding precision '{quantize}'. Use one of {PRECISIONS}.")
+        return
+    seed = get_seed()
+    seed_everything(seed)
     try:
         from sentence_transformers import SentenceTransformer
         encoder = SentenceTransformer('all-MiniLM-L6-v2')
@@ -22,7 +39,8 @@ def build_graph():
         print("ERROR: data/synthetic_orders.csv not found. Run generate_synthetic_data.py first.")
         return
         
-    all_items = set(df['cart_items'].unique()).union(set(df['candidate_item'].unique()))
+    # Sorted so the graph (and Stage 1 tie-breaking) doesn't depend on the per-process hash seed
+    all_items = sorted(set(df['cart_items'].unique()).union(set(df['candidate_item'].unique())))
     
     # Map item -> region for inference ranker consistency
     # We take the most frequent region associated with each item
@@ -73,8 +91,20 @@ def build_graph():
     os.makedirs("data", exist_ok=True)
     with open("data/regional_affinity_map.json", "w") as f:
         json.dump(affinity_map, f)
+    record_artifacts(["data/regional_affinity_map.json"], "build_graph", seed)
+
+    if quantize:
+        matrix = [affinity_map[dish]["embedding"] for dish in all_items]
+        paths = save_embeddings(all_items, matrix, quantize, affinity_map)
+        record_artifacts(paths, "build_graph", seed)
+        print(f"DEBUG: {quantize} catalog embeddings written to {os.path.dirname(paths[0])}/")
         
     print(f"SUCCESS: Knowledge Graph built with {len(all_items)} normalized Item Embeddings.")
 
 if __name__ == "__main__":
-    build_graph()
+    import argparse
+    parser = argparse.ArgumentParser(description="Build the regional affinity graph.")
+    parser.add_argument("--quantize", choices=PRECISIONS, default=None,
+                        help="Also write quantized catalog embeddings for the engine")
+    args = parser.parse_args()
+    build_graph(quantize=args.quantize)
@@ -1,16 +1,43 @@
 # src/offline_pipeline/train_ranker.py
 
 import pandas as pd
+import numpy as np
 import pickle
 from sklearn.preprocessing import LabelEncoder
 import os
+import sys
 import json
+import time
+import hashlib
+import itertools
 import lightgbm as lgb
+from concurrent.futures import ProcessPoolExecutor
 
-def train_model():
-    print("DEBUG: Loading training data...")
-    df = pd.read_csv("data/synthetic_orders.csv")
-    
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from reproducibility import get_seed, seed_everything, record_artifacts, file_sha256
+
+# Bump when build_features changes so cached binary Datasets are not reused across feature definitions
+FEATURE_VERSION = 1
+DATASET_CACHE_DIR = "data/lgb_cache"
+
+# Search space for --tune. Dataset-level params (max_bin etc.) are deliberately excluded so every
+# candidate can share the same cached binned Dataset.
+SWEEP_GRID = {
+    "num_leaves": [15, 31, 63],
+    "learning_rate": [0.03, 0.1],
+    "min_data_in_leaf": [20, 50],
+    "feature_fraction": [0.8, 1.0],
+    "lambda_l2": [0.0, 1.0]
+}
+# lgb.train parameter names -> LGBMRanker constructor names, for the final refit
+SKLEARN_NAMES = {"min_data_in_leaf": "min_child_samples", "feature_fraction": "colsample_bytree", "lambda_l2": "reg_lambda"}
+BASELINE_PARAMS = {"num_leaves": 31, "learning_rate": 0.03, "min_data_in_leaf": 20, "feature_fraction": 0.8, "lambda_l2": 0.0}
+# Held fixed for every candidate and the refit, matching train_model()
+FIXED_PARAMS = {"max_depth": 10}
+LATENCY_RUNS = 100
+
+def build_features(df, graph):
+    """Returns (X, y, groups, order_ids, encoders) sorted by order_id for LambdaMART."""
     # Feature Engineering
     le_segment = LabelEncoder()
     le_freq = LabelEncoder()
@@ -18,23 +45,19 @@ def train_model():
     le_region = LabelEncoder()
     le_item = LabelEncoder()
     le_cart = LabelEncoder()
-    
-    with open("data/regional_affinity_map.json", "r") as f:
-        graph = json.load(f)
-        
-    def get_embedding_score(row):
-        cart = row['cart_items']
-        cand = row['candidate_item']
+
+    def get_embedding_score(cart, cand):
         if cart in graph and cand in graph[cart]['candidates']:
             return graph[cart]['candidates'][cand]
         return 0.1
-        
-    df['embedding_affinity_score'] = df.apply(get_embedding_score, axis=1)
-    
+
+    df = df.copy()
+    df['embedding_affinity_score'] = [get_embedding_score(c, a) for c, a in zip(df['cart_items'], df['candidate_item'])]
+
     # Sort and group for Learning-to-Rank algorithms (LambdaMART)
-    df = df.sort_values('order_id')
-    groups = df.groupby('order_id').size().values
-    
+    df = df.sort_values('order_id', kind="stable").reset_index(drop=True)
+    groups = df.groupby('order_id', sort=True).size().values
+
     X = pd.DataFrame()
     X['user_segment'] = le_segment.fit_transform(df['user_segment'])
     X['order_frequency'] = le_freq.fit_transform(df['order_frequency'])
@@ -42,16 +65,46 @@ def train_model():
     X['region'] = le_region.fit_transform(df['region'])
     X['candidate_item'] = le_item.fit_transform(df['candidate_item'])
     X['cart_items'] = le_cart.fit_transform(df['cart_items'])
-    
-    # Direct Numeric Features
-    X['cart_total_value'] = df['cart_total_value']
-    X['addon_price'] = df['addon_price']
-    X['is_veg'] = df['is_veg']
-    X['user_historical_veg_ratio'] = df['user_historical_veg_ratio']
-    X['embedding_affinity_score'] = df['embedding_affinity_score']
-    
-    y = df['added']
-    
+
+    # Direct Numeric Features (positional, so they stay aligned with the sorted rows)
+    X['cart_total_value'] = df['cart_total_value'].to_numpy()
+    X['addon_price'] = df['addon_price'].to_numpy()
+    X['is_veg'] = df['is_veg'].to_numpy()
+    X['user_historical_veg_ratio'] = df['user_historical_veg_ratio'].to_numpy()
+    X['embedding_affinity_score'] = df['embedding_affinity_score'].to_numpy()
+
+    y = df['added'].to_numpy()
+    encoders = {
+        "segment": le_segment,
+        "freq": le_freq,
+        "time": le_time,
+        "region": le_region,
+        "item": le_item,
+        "cart": le_cart
+    }
+    return X, y, groups, df['order_id'].to_numpy(), encoders
+
+def load_training_data():
+    print("DEBUG: Loading training data...")
+    df = pd.read_csv("data/synthetic_orders.csv")
+    with open("data/regional_affinity_map.json", "r") as f:
+        graph = json.load(f)
+    return df, graph
+
+def save_artifacts(model, encoders, seed):
+    # Save Model and Encoders
+    artifacts = {"model": model, "encoders": encoders}
+    with open("data/ranker_model.pkl", "wb") as f:
+        pickle.dump(artifacts, f)
+    record_artifacts(["data/ranker_model.pkl"], "train_ranker", seed)
+    print("SUCCESS: Ranker model saved to data/ranker_model.pkl")
+
+def train_model():
+    seed = get_seed()
+    seed_everything(seed)
+    df, graph = load_training_data()
+    X, y, groups, _, encoders = build_features(df, graph)
+
     print("DEBUG: Training Stage 2 Ranker (LightGBM LambdaMART)...")
     model = lgb.LGBMRanker(
         objective="lambdarank",
@@ -63,27 +116,166 @@ def train_model():
         min_child_samples=20,    # Regularization
         subsample=0.8,           # Row sampling
         colsample_bytree=0.8,    # Feature sampling
-        random_state=42
+        random_state=42 if seed is None else seed,
+        # Reproducible build mode: identical trees across runs and machines
+        **({"deterministic": True, "force_row_wise": True} if seed is not None else {})
     )
     model.fit(X, y, group=groups)
-    
-    # Save Model and Encoders
-    artifacts = {
-        "model": model,
-        "encoders": {
-            "segment": le_segment,
-            "freq": le_freq,
-            "time": le_time,
-            "region": le_region,
-            "item": le_item,
-            "cart": le_cart
-        }
+    save_artifacts(model, encoders, seed)
+
+def _group_split(order_ids, valid_fraction, seed):
+    """Boolean validation mask that keeps every order's rows on one side of the split."""
+    unique_orders = np.unique(order_ids)
+    rng = np.random.default_rng(seed)
+    valid_orders = rng.choice(unique_orders, size=max(1, int(len(unique_orders) * valid_fraction)), replace=False)
+    return np.isin(order_ids, valid_orders)
+
+def _cached_datasets(X, y, order_ids, valid_fraction, seed):
+    """Builds (or reuses) binned train/valid LightGBM Datasets saved as binary files."""
+    key = hashlib.sha256()
+    for path in ("data/synthetic_orders.csv", "data/regional_affinity_map.json"):
+        key.update(file_sha256(path).encode())
+    key.update(f"v{FEATURE_VERSION}|{valid_fraction}|{seed}".encode())
+    prefix = os.path.join(DATASET_CACHE_DIR, key.hexdigest()[:16])
+    train_bin, valid_bin = f"{prefix}_train.bin", f"{prefix}_valid.bin"
+
+    if os.path.exists(train_bin) and os.path.exists(valid_bin):
+        print(f"DEBUG: Reusing cached binary Datasets {prefix}_*.bin")
+        return train_bin, valid_bin
+
+    print("DEBUG: Binning features into LightGBM Datasets (cached for later runs)...")
+    mask = _group_split(order_ids, valid_fraction, seed)
+    # Rows are sorted by order_id, so group sizes are run lengths of each side
+    train_groups = pd.Series(order_ids[~mask]).groupby(order_ids[~mask], sort=False).size().values
+    valid_groups = pd.Series(order_ids[mask]).groupby(order_ids[mask], sort=False).size().values
+
+    os.makedirs(DATASET_CACHE_DIR, exist_ok=True)
+    train = lgb.Dataset(X[~mask], label=y[~mask], group=train_groups, free_raw_data=False)
+    valid = lgb.Dataset(X[mask], label=y[mask], group=valid_groups, reference=train, free_raw_data=False)
+    train.construct().save_binary(train_bin)
+    valid.construct().save_binary(valid_bin)
+    return train_bin, valid_bin
+
+def _train_candidate(params, train_bin, valid_bin, early_stopping_rounds, max_rounds):
+    """Sweep worker: trains one candidate with early stopping; latency is measured later in the parent."""
+    train = lgb.Dataset(train_bin)
+    valid = lgb.Dataset(valid_bin, reference=train)
+
+    start = time.perf_counter()
+    booster = lgb.train(
+        params, train, num_boost_round=max_rounds, valid_sets=[valid], valid_names=["valid"],
+        callbacks=[lgb.early_stopping(early_stopping_rounds, verbose=False)]
+    )
+    train_seconds = time.perf_counter() - start
+    best_iteration = booster.best_iteration or booster.current_iteration()
+    model_string = booster.model_to_string(num_iteration=best_iteration)
+
+    return {
+        "params": {k: params[k] for k in SWEEP_GRID},
+        "ndcg@8": booster.best_score["valid"]["ndcg@8"],
+        "best_iteration": best_iteration,
+        "train_seconds": train_seconds,
+        "model_kb": len(model_string.encode()) / 1024,
+        "model_string": model_string
     }
-    
-    with open("data/ranker_model.pkl", "wb") as f:
-        pickle.dump(artifacts, f)
-        
-    print("SUCCESS: Ranker model saved to data/ranker_model.pkl")
+
+def _measure_latency(result, sample, num_threads):
+    """Per-request latency: one Stage 2 call scores a ~50-row candidate frame."""
+    booster = lgb.Booster(model_str=result.pop("model_string"))
+    booster.predict(sample, num_threads=num_threads)
+    timings = []
+    for _ in range(LATENCY_RUNS):
+        t0 = time.perf_counter()
+        booster.predict(sample, num_threads=num_threads)
+        timings.append((time.perf_counter() - t0) * 1000)
+    result["latency_ms_p50"] = float(np.median(timings))
+    result["latency_ms_p99"] = float(np.percentile(timings, 99))
+
+def tune_model(max_candidates=8, workers=None, valid_fraction=0.2, early_stopping_rounds=30,
+               max_rounds=1000, max_latency_ms=None):
+    """
+    Validated training mode: grouped train/valid split, early stopping, and a bounded parallel
+    sweep over SWEEP_GRID. The winner (best NDCG@8 within the optional latency budget) is refit
+    on all data for its best iteration count and saved like train_model().
+    """
+    seed = get_seed()
+    seed_everything(seed)
+    split_seed = 42 if seed is None else seed
+    df, graph = load_training_data()
+    X, y, groups, order_ids, encoders = build_features(df, graph)
+    train_bin, valid_bin = _cached_datasets(X, y, order_ids, valid_fraction, split_seed)
+
+    combos = [dict(zip(SWEEP_GRID, values)) for values in itertools.product(*SWEEP_GRID.values())]
+    rng = np.random.default_rng(split_seed)
+    others = [c for c in combos if c != BASELINE_PARAMS]
+    picks = rng.choice(len(others), size=min(max_candidates - 1, len(others)), replace=False)
+    candidates = [BASELINE_PARAMS] + [others[i] for i in picks]
+
+    workers = workers or min(len(candidates), os.cpu_count() or 1)
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    base = {"objective": "lambdarank", "metric": "ndcg", "eval_at": [8], "num_threads": threads,
+            "seed": split_seed, "verbosity": -1, **FIXED_PARAMS}
+    if seed is not None:
+        base.update({"deterministic": True, "force_row_wise": True})
+    sample = X.iloc[:50].copy()
+
+    print(f"DEBUG: Sweeping {len(candidates)} candidates on {workers} workers x {threads} threads...")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_train_candidate, {**base, **c}, train_bin, valid_bin,
+                               early_stopping_rounds, max_rounds) for c in candidates]
+        results = [f.result() for f in futures]
+
+    # Timed serially once training is over, so other workers don't contend for the cores
+    print("DEBUG: Measuring per-request inference latency of each candidate...")
+    for r in results:
+        _measure_latency(r, sample, threads)
+
+    eligible = [r for r in results if max_latency_ms is None or r["latency_ms_p50"] <= max_latency_ms]
+    if not eligible:
+        print(f"WARNING: No candidate meets the {max_latency_ms} ms p50 latency budget; "
+              "selecting the best NDCG@8 regardless of latency.")
+        eligible = results
+    best = max(eligible, key=lambda r: r["ndcg@8"])
+
+    lines = ["================ RANKER HYPERPARAMETER SWEEP ================",
+             f"Grouped validation split: {valid_fraction:.0%} of orders | Early stopping: {early_stopping_rounds} rounds"
+             f" | Fixed: {FIXED_PARAMS}",
+             f"{'NDCG@8':>7} {'Trees':>6} {'Train s':>8} {'Model KB':>9} {'p50 ms':>7} {'p99 ms':>7}  Params"]
+    for r in sorted(results, key=lambda r: -r["ndcg@8"]):
+        marker = " <- selected" if r is best else ""
+        lines.append(f"{r['ndcg@8']:>7.4f} {r['best_iteration']:>6} {r['train_seconds']:>8.2f} {r['model_kb']:>9.1f} "
+                     f"{r['latency_ms_p50']:>7.3f} {r['latency_ms_p99']:>7.3f}  {r['params']}{marker}")
+    lines.append("=============================================================")
+    report = "\n".join(lines)
+    print(report)
+    os.makedirs("2_Evaluation_Results", exist_ok=True)
+    with open("2_Evaluation_Results/ranker_sweep_metrics.txt", "w") as f:
+        f.write(report)
+
+    print(f"DEBUG: Refitting selected candidate on all data for {best['best_iteration']} trees...")
+    model = lgb.LGBMRanker(
+        objective="lambdarank",
+        metric="ndcg",
+        n_estimators=best["best_iteration"],
+        random_state=split_seed,
+        verbosity=-1,
+        **FIXED_PARAMS,
+        **{SKLEARN_NAMES.get(k, k): v for k, v in best["params"].items()},
+        **({"deterministic": True, "force_row_wise": True} if seed is not None else {})
+    )
+    model.fit(X, y, group=groups)
+    save_artifacts(model, encoders, seed)
+    return results
 
 if __name__ == "__main__":
-    train_model()
+    import argparse
+    parser = argparse.ArgumentParser(description="Train the Stage 2 LightGBM ranker.")
+    parser.add_argument("--tune", action="store_true", help="Validated training with a parallel hyperparameter sweep")
+    parser.add_argument("--max-candidates", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--max-latency-ms", type=float, default=None, help="Only select models under this p50 latency")
+    args = parser.parse_args()
+    if args.tune:
+        tune_model(max_candidates=args.max_candidates, workers=args.workers, max_latency_ms=args.max_latency_ms)
+    else:
+        train_model()
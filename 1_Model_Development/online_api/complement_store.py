@@ -0,0 +1,114 @@
+# src/online_api/complement_store.py
+
+import json
+import os
+import numpy as np
+
+STORE_DIR = "data/processed/complement_csr"
+ID_PREFIX = "DISH_"
+
+def dish_id_to_int(dish_id):
+    return int(dish_id[len(ID_PREFIX):])
+
+def int_to_dish_id(value, width=6):
+    return f"{ID_PREFIX}{int(value):0{width}d}"
+
+class ComplementStore:
+    """
+    Read-only complement graph backed by memory-mapped int32 CSR arrays.
+
+    Node ids are the numeric part of `DISH_xxxxxx`, so neighbours of dish i are
+    indices[indptr[i]:indptr[i + 1]]. Names are kept as one sorted UTF-8 blob with offsets,
+    which lets every worker share the same pages instead of holding its own dicts of strings.
+
+    Not loaded by TwoStageEngine yet: the serving catalog's dish names have no DISH_ id mapping,
+    so there is no way to look a cart up in this graph until such a bridge is built.
+    """
+    def __init__(self, store_dir=STORE_DIR):
+        def load(name):
+            return np.load(os.path.join(store_dir, f"{name}.npy"), mmap_mode="r")
+
+        with open(os.path.join(store_dir, "meta.json"), "r") as f:
+            self.meta = json.load(f)
+        self.indptr = load("indptr")
+        self.indices = load("indices")
+        self.name_blob = load("name_blob")
+        self.name_offsets = load("name_offsets")
+        self.name_ids = load("name_ids")
+        self.id_name_pos = load("id_name_pos")
+        self.num_nodes = len(self.indptr) - 1
+
+    @classmethod
+    def exists(cls, store_dir=STORE_DIR):
+        return os.path.exists(os.path.join(store_dir, "meta.json"))
+
+    def _name_at(self, pos):
+        start, end = self.name_offsets[pos], self.name_offsets[pos + 1]
+        return bytes(self.name_blob[start:end]).decode("utf-8")
+
+    def lookup(self, name):
+        """Binary search over the sorted name index. Returns the int dish id or None."""
+        lo, hi = 0, len(self.name_ids)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._name_at(mid) < name: lo = mid + 1
+            else: hi = mid
+        if lo < len(self.name_ids) and self._name_at(lo) == name:
+            return int(self.name_ids[lo])
+        return None
+
+    def name_of(self, node):
+        pos = self.id_name_pos[node] if 0 <= node < self.num_nodes else -1
+        return self._name_at(pos) if pos >= 0 else None
+
+    def neighbors(self, node):
+        if not 0 <= node < self.num_nodes:
+            return self.indices[0:0]
+        return self.indices[self.indptr[node]:self.indptr[node + 1]]
+
+    def expand(self, seeds, hops=2):
+        """
+        Vectorized multi-hop expansion from a set of seed ids.
+        Returns (ids, hop) for every node reached within `hops`, excluding the seeds, ordered by
+        hop distance and then by how many frontier nodes point at it.
+        """
+        seeds = np.unique(np.asarray(seeds, dtype=np.int64))
+        seeds = seeds[(seeds >= 0) & (seeds < self.num_nodes)]
+        visited = np.zeros(self.num_nodes, dtype=bool)
+        visited[seeds] = True
+        frontier = seeds
+        found_ids, found_hops = [], []
+
+        for hop in range(1, hops + 1):
+            if len(frontier) == 0: break
+            starts = np.asarray(self.indptr[frontier], dtype=np.int64)
+            lengths = np.asarray(self.indptr[frontier + 1], dtype=np.int64) - starts
+            total = int(lengths.sum())
+            if total == 0: break
+            # Gather every neighbour slice in one shot: offsets of each slice + position within it
+            positions = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(total)
+            reached, first, counts = np.unique(
+                np.asarray(self.indices[positions], dtype=np.int64), return_index=True, return_counts=True
+            )
+
+            fresh = ~visited[reached]
+            reached, first, counts = reached[fresh], first[fresh], counts[fresh]
+            # Most-shared first; ties keep the original complement-list order
+            order = np.lexsort((first, -counts))
+            found_ids.append(reached[order])
+            found_hops.append(np.full(len(reached), hop, dtype=np.int32))
+            visited[reached] = True
+            frontier = reached
+
+        if not found_ids:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int32)
+        return np.concatenate(found_ids), np.concatenate(found_hops)
+
+    def complements_for(self, names, hops=1, limit=50):
+        """Complement dish names for a list of dish names (names that are not in the store are skipped)."""
+        seeds = [node for node in (self.lookup(n) for n in names) if node is not None]
+        ids, _ = self.expand(seeds, hops=hops)
+        results = []
+        for node in ids[:limit].tolist():
+            results.append(self.name_of(node) or int_to_dish_id(node, self.meta.get("id_width", 6)))
+        return results
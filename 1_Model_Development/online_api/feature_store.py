@@ -0,0 +1,69 @@
+# src/online_api/feature_store.py
+
+import json
+import os
+import numpy as np
+
+STORE_DIR = "data/feature_store"
+USER_COLUMNS = ["veg_ratio", "segment", "frequency", "order_count", "avg_cart_value"]
+
+class FeatureStore:
+    """
+    Offline-built user and item features as memory-mapped columnar arrays.
+
+    Numeric user ids (`U_<n>`) index a dense row table directly, so a lookup is two array reads;
+    any other ids fall back to a dict loaded from user_keys.json. Categorical columns are small
+    integer codes into the vocabularies kept in meta.json.
+    """
+    def __init__(self, store_dir=STORE_DIR):
+        def load(name):
+            return np.load(os.path.join(store_dir, f"{name}.npy"), mmap_mode="r")
+
+        with open(os.path.join(store_dir, "meta.json"), "r") as f:
+            self.meta = json.load(f)
+        self.user_prefix = self.meta["user_prefix"]
+        self.user_index = load("user_index")
+        self.columns = {col: load(f"user_{col}") for col in USER_COLUMNS}
+
+        self.user_keys = {}
+        keys_path = os.path.join(store_dir, "user_keys.json")
+        if os.path.exists(keys_path):
+            with open(keys_path, "r") as f:
+                self.user_keys = json.load(f)
+
+        with open(os.path.join(store_dir, "item_names.json"), "r") as f:
+            self.item_names = json.load(f)
+        self.item_price = load("item_price")
+        self.item_row = {name: i for i, name in enumerate(self.item_names)}
+
+    @classmethod
+    def exists(cls, store_dir=STORE_DIR):
+        return os.path.exists(os.path.join(store_dir, "meta.json"))
+
+    def _user_row(self, user_id):
+        if user_id is None:
+            return -1
+        suffix = user_id[len(self.user_prefix):] if user_id.startswith(self.user_prefix) else ""
+        # isdigit() alone accepts e.g. "²", which int() rejects
+        if suffix.isascii() and suffix.isdecimal():
+            n = int(suffix)
+            return int(self.user_index[n]) if n < len(self.user_index) else -1
+        return self.user_keys.get(user_id, -1)
+
+    def user_features(self, user_id):
+        """Decoded feature dict for a known user, else None."""
+        row = self._user_row(user_id)
+        if row < 0:
+            return None
+        return {
+            "user_historical_veg_ratio": round(float(self.columns["veg_ratio"][row]), 4),
+            "user_segment": self.meta["segments"][self.columns["segment"][row]],
+            "order_frequency": self.meta["frequencies"][self.columns["frequency"][row]],
+            "order_count": int(self.columns["order_count"][row]),
+            "avg_cart_value": float(self.columns["avg_cart_value"][row])
+        }
+
+    def prices_for(self, names, default=np.nan):
+        """Catalog prices aligned with `names`; unknown items get `default`."""
+        return np.array([self.item_price[self.item_row[n]] if n in self.item_row else default for n in names],
+                        dtype=np.float64)
@@ -5,127 +5,221 @@ import json
 import pandas as pd
 import time
 import os
+import sys
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 from collections import Counter
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from quantized_embeddings import GRAPH_META_FILE, PRECISION_ENV_VAR, PRECISIONS, QuantizedEmbeddings
+from name_resolver import NameResolver
+from feature_store import FeatureStore
+
+NON_VEG_KEYWORDS = ["Chicken", "Mutton", "Fish", "Prawn", "Keema", "Meat", "Egg", "Pepperoni"]
+BEVERAGE_KEYWORDS = ["Water", "Coke", "Soda", "Lassi", "Juice", "Tea", "Coffee", "Shake", "Drink"]
+GLOBAL_REGIONS = ["Desserts", "Beverages"]
+# Ranker inputs used when no feature store is built or the user/item is unknown
+DEFAULT_USER_SEGMENT = "Budget"
+DEFAULT_VEG_RATIO = 0.5
+DEFAULT_ORDER_FREQUENCY = 1
+DEFAULT_CART_VALUE = 300
+DEFAULT_ADDON_PRICE = 50
+# Quantized Stage 1 scans with approximate scores, then re-scores this many x 50 rows exactly
+RESCORE_FACTOR = 4
+
 class TwoStageEngine:
     """
-    Two-Stage Recommendation Engine: 
+    Two-Stage Recommendation Engine:
     Stage 1: Vector Retrieval (all-MiniLM-L6-v2) with strict cuisine filtering.
     Stage 2: LightGBM Ranking (LambdaMART).
     """
-    def __init__(self):
-        data_path = "data/"
-        if not os.path.exists(data_path):
-            data_path = "../../data/"
-            
-        with open(os.path.join(data_path, "regional_affinity_map.json"), "r") as f:
+    def __init__(self, load_hook=None, data_path=None, precision=None):
+        # load_hook(component) is called after each component is loaded (used by the memory profiler).
+        # data_path / precision override the artifact directory and CSAO_EMBEDDING_PRECISION, e.g. for a shadow engine.
+        loaded = load_hook or (lambda component: None)
+        if data_path is None:
+            data_path = "data/"
+            if not os.path.exists(data_path):
+                data_path = "../../data/"
+
+        # With CSAO_EMBEDDING_PRECISION=float16|int8 Stage 1 scans quantized codes and the exact float32
+        # vectors stay memory-mapped on disk for re-scoring the shortlist; the graph is then read from an
+        # embedding-free copy so the per-dish float lists are never parsed.
+        precision = precision or os.environ.get(PRECISION_ENV_VAR, "float")
+        embedding_dir = os.path.join(data_path, "embeddings")
+        if precision != "float":
+            if precision not in PRECISIONS:
+                raise ValueError(f"Unsupported embedding precision '{precision}'. Use 'float' or one of {PRECISIONS}.")
+            if not QuantizedEmbeddings.exists(precision, embedding_dir):
+                raise FileNotFoundError(f"{precision} embeddings not found in {embedding_dir}. Run "
+                                        f"`build_graph.py --quantize {precision}` or unset {PRECISION_ENV_VAR}.")
+            graph_path = os.path.join(embedding_dir, GRAPH_META_FILE)
+        else:
+            graph_path = os.path.join(data_path, "regional_affinity_map.json")
+
+        with open(graph_path, "r") as f:
             self.graph = json.load(f)
+        loaded("affinity_graph_json")
         with open(os.path.join(data_path, "ranker_model.pkl"), "rb") as f:
             artifacts = pickle.load(f)
             self.model = artifacts['model']
             self.encoders = artifacts['encoders']
-            
+        loaded("ranker_model")
+
         try:
             from sentence_transformers import SentenceTransformer
             self.encoder = SentenceTransformer('all-MiniLM-L6-v2')
         except ImportError:
             self.encoder = None
+        loaded("sentence_encoder")
+
+        # Dense catalog matrix so Stage 1 is a single matrix product instead of a per-dish loop
+        self.embeddings = None
+        if precision != "float":
+            self.embeddings = QuantizedEmbeddings(precision, embedding_dir)
+            self.dish_names = list(self.embeddings.names)
+            self.dish_matrix = self.embeddings.exact
+        else:
+            self.dish_names = list(self.graph.keys())
+            embeddings = np.array([self.graph[d]["embedding"] for d in self.dish_names], dtype=np.float64)
+            self.dish_matrix = embeddings / (np.linalg.norm(embeddings, axis=1, keepdims=True) + 1e-9)
+        self.dish_index = {name: i for i, name in enumerate(self.dish_names)}
+        self.dish_regions = np.array([self.graph.get(d, {}).get("region", "Unknown") for d in self.dish_names])
+        self.dish_popularity = np.array([self.graph.get(d, {}).get("popularity", 0.0) for d in self.dish_names])
+        loaded("catalog_index")
+
+        # Free-text cart strings ("Veg Hakka Noodles") -> catalog keys, so they get region detection
+        # and the precomputed-vector fast path instead of a transformer encode
+        self.name_resolver = NameResolver(self.dish_names, protected=NON_VEG_KEYWORDS)
+        loaded("name_resolver")
+
+        # Offline user/item features (memory-mapped), present once build_feature_store.py has run
+        store_dir = os.path.join(data_path, "feature_store")
+        self.feature_store = FeatureStore(store_dir) if FeatureStore.exists(store_dir) else None
+        loaded("feature_store")
 
-    def recommend(self, cart_items, user_segment="Budget", time_of_day="Lunch", user_veg_ratio=0.5):
+        # LabelEncoder classes_ are sorted, so the encoded value is simply the class position
+        self.item_codes = {item: i for i, item in enumerate(self.encoders["item"].classes_)}
+        self.freq_codes = {freq: i for i, freq in enumerate(self.encoders["freq"].classes_)}
+
+    def _encode_items(self, items):
+        """Returns {item: normalized vector}, using precomputed catalog vectors and one batched encode for the rest."""
+        vectors = {item: np.asarray(self.dish_matrix[self.dish_index[item]]) for item in set(items) if item in self.dish_index}
+        unseen = sorted(set(items) - set(vectors))
+        if unseen and self.encoder:
+            for item, vec in zip(unseen, self.encoder.encode(unseen, normalize_embeddings=True)):
+                vectors[item] = vec
+        return vectors
+
+    def _context_vector(self, cart_items, vectors):
+        cart_vectors = [vectors[item] for item in cart_items if item in vectors]
+        if not cart_vectors:
+            return None
+        if len(cart_vectors) > 1:
+            last_vec = cart_vectors[-1]
+            others_mean = np.mean(cart_vectors[:-1], axis=0)
+            others_mean = others_mean / (np.linalg.norm(others_mean) + 1e-9)
+            context = 0.5 * last_vec + 0.5 * others_mean
+        else:
+            context = cart_vectors[0]
+        return context / (np.linalg.norm(context) + 1e-9)
+
+    def _dominant_region(self, cart_items):
         # Stage 0: Detect primary cuisine region
         cart_regions = [self.graph.get(item, {}).get("region", "Unknown") for item in cart_items]
         cart_regions = [r for r in cart_regions if r != "Unknown"]
-        dominant_region = Counter(cart_regions).most_common(1)[0][0] if cart_regions else "North Indian"
-        
-        # Stage 1: Candidate Retrieval (Top 50)
-        candidate_scores = {}
-        if self.encoder:
-            vectors = [self.encoder.encode([item], normalize_embeddings=True)[0] for item in cart_items]
-            
-            if len(vectors) > 1:
-                last_vec = vectors[-1]
-                others_mean = np.mean(vectors[:-1], axis=0)
-                others_mean = others_mean / (np.linalg.norm(others_mean) + 1e-9)
-                context_vector = (0.5 * last_vec + 0.5 * others_mean).reshape(1, -1)
-            else:
-                context_vector = vectors[0].reshape(1, -1)
-            
-            similarities = []
-            for dish_name, data in self.graph.items():
-                if dish_name in cart_items: continue
-                
-                # Strict Cuisine Filtering
-                item_region = data.get("region", "Unknown")
-                if item_region not in [dominant_region, "Desserts", "Beverages"]:
-                    continue
-                
-                dish_vec = np.array(data["embedding"]).reshape(1, -1)
-                sim = cosine_similarity(context_vector, dish_vec)[0][0]
-                
-                # Popularity Penalty
-                pop = data.get("popularity", 0.0)
-                adjusted_score = sim - 0.1 * pop
-                similarities.append((dish_name, adjusted_score))
-            
-            similarities = sorted(similarities, key=lambda x: x[1], reverse=True)[:50]
-            for cand, score in similarities:
-                candidate_scores[cand] = score
-
-        if not candidate_scores:
-            candidate_scores = {"Coke": 0.1, "Water": 0.1, "Fries": 0.1}
-
-        # Stage 2: LightGBM Ranking
-        unique_candidates = list(candidate_scores.keys())
+        return Counter(cart_regions).most_common(1)[0][0] if cart_regions else "North Indian"
+
+    def _similarities(self, contexts):
+        if self.embeddings is not None:
+            return self.embeddings.score(contexts)
+        return contexts @ self.dish_matrix.T
+
+    def _retrieve(self, cart_items, dominant_region, similarities, context):
+        """Stage 1: Top 50 candidates from one row of precomputed cosine similarities."""
+        # Strict Cuisine Filtering
+        allowed = np.isin(self.dish_regions, [dominant_region] + GLOBAL_REGIONS)
+        for item in cart_items:
+            if item in self.dish_index:
+                allowed[self.dish_index[item]] = False
+
+        # Popularity Penalty
+        adjusted = similarities - 0.1 * self.dish_popularity
+        allowed_idx = np.flatnonzero(allowed)
+        if self.embeddings is not None:
+            # Approximate shortlist from the quantized scan, then exact float re-score
+            shortlist = allowed_idx[np.argsort(-adjusted[allowed_idx], kind="stable")[:50 * RESCORE_FACTOR]]
+            rows, exact = self.embeddings.rescore(context, shortlist)
+            exact = exact - 0.1 * self.dish_popularity[rows]
+            top = np.argsort(-exact, kind="stable")[:50]
+            return {self.dish_names[rows[i]]: float(exact[i]) for i in top}
+        order = allowed_idx[np.argsort(-adjusted[allowed_idx], kind="stable")[:50]]
+        return {self.dish_names[i]: float(adjusted[i]) for i in order}
+
+    def _user_context(self, req):
+        """Fills user features from the feature store; explicit request values always win."""
+        profile = None
+        if self.feature_store is not None and req.get("user_id"):
+            profile = self.feature_store.user_features(req["user_id"])
+        profile = profile or {}
+
+        segment = req.get("user_segment") or profile.get("user_segment") or DEFAULT_USER_SEGMENT
+        veg_ratio = req.get("user_veg_ratio")
+        if veg_ratio is None:
+            veg_ratio = profile.get("user_historical_veg_ratio", DEFAULT_VEG_RATIO)
+        frequency = self.freq_codes.get(profile.get("order_frequency"), DEFAULT_ORDER_FREQUENCY)
+        return segment, veg_ratio, frequency
+
+    def _prices(self, cart_items, candidates):
+        if self.feature_store is None:
+            return DEFAULT_CART_VALUE, np.full(len(candidates), DEFAULT_ADDON_PRICE, dtype=np.float64)
+        cart_prices = self.feature_store.prices_for(cart_items)
+        known = cart_prices[~np.isnan(cart_prices)]
+        cart_value = float(known.sum()) if len(known) else DEFAULT_CART_VALUE
+        return cart_value, self.feature_store.prices_for(candidates, default=DEFAULT_ADDON_PRICE)
+
+    def _build_features(self, candidate_scores, req, dominant_region):
+        user_segment, user_veg_ratio, order_frequency = self._user_context(req)
+        seg_enc = self.encoders["segment"].transform([user_segment])[0]
+        time_enc = self.encoders["time"].transform([req["time_of_day"]])[0]
+        reg_enc = self.encoders["region"].transform([dominant_region])[0]
+        cart_value, addon_prices = self._prices(req["cart_items"], list(candidate_scores))
+
         features = []
-        for cand in unique_candidates:
-            seg_enc = self.encoders["segment"].transform([user_segment])[0]
-            time_enc = self.encoders["time"].transform([time_of_day])[0]
-            reg_enc = self.encoders["region"].transform([dominant_region])[0]
-            
-            try:
-                item_enc = self.encoders["item"].transform([cand])[0]
-            except:
-                item_enc = 0 
-            
+        for (cand, affinity), addon_price in zip(candidate_scores.items(), addon_prices):
             is_veg = 1
-            non_veg_keywords = ["Chicken", "Mutton", "Fish", "Prawn", "Keema", "Meat", "Egg", "Pepperoni"]
-            if any(kw.lower() in cand.lower() for kw in non_veg_keywords): is_veg = 0
-            
+            if any(kw.lower() in cand.lower() for kw in NON_VEG_KEYWORDS): is_veg = 0
+
             features.append({
                 "user_segment": seg_enc,
-                "order_frequency": 1,
+                "order_frequency": order_frequency,
                 "time_of_day": time_enc,
                 "region": reg_enc,
-                "candidate_item": item_enc,
-                "cart_items": 0, 
-                "cart_total_value": 300,
-                "addon_price": 50,
+                "candidate_item": self.item_codes.get(cand, 0),
+                "cart_items": 0,
+                "cart_total_value": cart_value,
+                "addon_price": float(addon_price),
                 "is_veg": is_veg,
                 "user_historical_veg_ratio": user_veg_ratio,
-                "embedding_affinity_score": candidate_scores[cand]
+                "embedding_affinity_score": affinity
             })
-        
-        if not features: return []
-        
-        probs = self.model.predict(pd.DataFrame(features))
+        return features
+
+    def _finalize(self, candidates, probs):
         ranked_results = []
-        for i, cand in enumerate(unique_candidates):
-            score = float(probs[i])
+        for cand, prob in zip(candidates, probs):
+            score = float(prob)
             if cand == "Mango Shake":
                 score *= 0.95
             ranked_results.append({"item": cand, "score": score})
-            
+
         ranked_results = sorted(ranked_results, key=lambda x: x['score'], reverse=True)
-        
+
         # Diversity Constraint: Max 2 Beverages
-        beverages = ["Water", "Coke", "Soda", "Lassi", "Juice", "Tea", "Coffee", "Shake", "Drink"]
         final_top_8 = []
         bev_count = 0
         for res in ranked_results:
             if len(final_top_8) >= 8: break
-            is_bev = any(bev.lower() in res['item'].lower() for bev in beverages)
+            is_bev = any(bev.lower() in res['item'].lower() for bev in BEVERAGE_KEYWORDS)
             if is_bev:
                 if bev_count < 2:
                     final_top_8.append(res)
@@ -133,3 +227,73 @@ class TwoStageEngine:
             else:
                 final_top_8.append(res)
         return final_top_8
+
+    def recommend_batch(self, requests, return_candidates=False, timings=None):
+        """
+        Runs several requests through one retrieval pass and one LightGBM predict call.
+        Each request is a dict of `recommend` keyword arguments; results are returned in the same order.
+        With return_candidates=True each result is a (top_8, stage_1_candidates) tuple.
+        If a `timings` dict is passed, it is filled with per-stage wall time in ms for the whole batch.
+        """
+        start = time.perf_counter()
+        requests = [{"time_of_day": "Lunch", **req} for req in requests]
+        for req in requests:
+            req["cart_items"] = self.name_resolver.canonicalize(req["cart_items"])
+        vectors = self._encode_items([item for req in requests for item in req["cart_items"]])
+        contexts = [self._context_vector(req["cart_items"], vectors) for req in requests]
+        encoded = time.perf_counter()
+
+        # Stage 1: Candidate Retrieval (Top 50) for every cart in one matrix product
+        with_context = [i for i, ctx in enumerate(contexts) if ctx is not None]
+        similarities = {}
+        if with_context:
+            sim_matrix = self._similarities(np.stack([contexts[i] for i in with_context]))
+            similarities = dict(zip(with_context, sim_matrix))
+
+        all_features, spans = [], []
+        featurize = 0.0
+        for i, req in enumerate(requests):
+            dominant_region = self._dominant_region(req["cart_items"])
+            candidate_scores = {}
+            if i in similarities:
+                candidate_scores = self._retrieve(req["cart_items"], dominant_region, similarities[i], contexts[i])
+            if not candidate_scores:
+                candidate_scores = {"Coke": 0.1, "Water": 0.1, "Fries": 0.1}
+
+            # Stage 2: LightGBM Ranking features, scored together below
+            t0 = time.perf_counter()
+            features = self._build_features(candidate_scores, req, dominant_region)
+            featurize += time.perf_counter() - t0
+            spans.append((list(candidate_scores.keys()), len(all_features), len(all_features) + len(features)))
+            all_features.extend(features)
+
+        if not all_features: return [([], []) if return_candidates else [] for _ in requests]
+
+        predict_start = time.perf_counter()
+        probs = self.model.predict(pd.DataFrame(all_features))
+        results = [self._finalize(cands, probs[lo:hi]) for cands, lo, hi in spans]
+        if timings is not None:
+            done = time.perf_counter()
+            timings.update({
+                "encode_ms": (encoded - start) * 1000,
+                "retrieval_ms": (predict_start - encoded - featurize) * 1000,
+                "features_ms": featurize * 1000,
+                "ranking_ms": (done - predict_start) * 1000,
+                "total_ms": (done - start) * 1000
+            })
+        if return_candidates:
+            return [(res, cands) for res, (cands, _, _) in zip(results, spans)]
+        return results
+
+    def recommend(self, cart_items, user_segment=None, time_of_day="Lunch", user_veg_ratio=None, user_id=None):
+        """
+        user_segment / user_veg_ratio default to the user's stored profile when `user_id` is known
+        to the feature store, and to Budget / 0.5 otherwise.
+        """
+        return self.recommend_batch([{
+            "cart_items": cart_items,
+            "user_segment": user_segment,
+            "time_of_day": time_of_day,
+            "user_veg_ratio": user_veg_ratio,
+            "user_id": user_id
+        }])[0]
@@ -0,0 +1,86 @@
+# src/online_api/name_resolver.py
+
+import re
+from collections import defaultdict
+from functools import lru_cache
+import numpy as np
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+def normalize_name(text):
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+def trigrams(text):
+    padded = f"  {normalize_name(text)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+def dice(a, b):
+    return 2.0 * len(a & b) / (len(a) + len(b)) if a or b else 0.0
+
+class NameResolver:
+    """
+    Maps free-text dish names onto catalog names with a character-trigram inverted index.
+
+    Exact (case/punctuation-insensitive) matches are a dict hit. Otherwise the posting lists of
+    the query's trigrams are counted in one bincount, and the most similar name whose Dice score
+    is above `threshold` and that passes a token check wins. Results, including misses, are memoized.
+
+    The token check keeps whole-string similarity from swapping dishes: every token of the catalog
+    name must match a query token (exactly or with token Dice >= token_threshold, so typos still
+    resolve), and every `protected` keyword in the query (e.g. non-veg markers) must be in the name.
+    """
+    def __init__(self, names, threshold=0.7, token_threshold=0.5, protected=(), cache_size=100_000):
+        self.names = list(names)
+        self.threshold = threshold
+        self.token_threshold = token_threshold
+        self.protected = [normalize_name(p) for p in protected]
+        self.name_tokens = [normalize_name(name).split() for name in self.names]
+        self.exact = {}
+        for i, name in enumerate(self.names):
+            self.exact.setdefault(normalize_name(name), i)
+
+        postings = defaultdict(list)
+        sizes = []
+        for i, name in enumerate(self.names):
+            grams = trigrams(name)
+            sizes.append(len(grams))
+            for gram in grams:
+                postings[gram].append(i)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self.sizes = np.array(sizes, dtype=np.float32)
+        self.resolve = lru_cache(maxsize=cache_size)(self._resolve)
+
+    def _resolve(self, text):
+        """Returns (catalog_name, similarity) or (None, best_similarity)."""
+        key = normalize_name(text)
+        if key in self.exact:
+            return self.names[self.exact[key]], 1.0
+
+        grams = trigrams(text)
+        lists = [self.postings[g] for g in grams if g in self.postings]
+        if not lists:
+            return None, 0.0
+        shared = np.bincount(np.concatenate(lists), minlength=len(self.names))
+        scores = 2.0 * shared / (self.sizes + len(grams))
+        above = np.flatnonzero(scores >= self.threshold)
+        for i in above[np.argsort(-scores[above], kind="stable")]:
+            if self._tokens_compatible(key, int(i)):
+                return self.names[i], float(scores[i])
+        # Below the bar: the caller passes the string through (transformer encode)
+        return None, float(scores.max())
+
+    def _tokens_compatible(self, key, i):
+        query_tokens = key.split()
+        query_grams = [trigrams(t) for t in query_tokens]
+        for token in self.name_tokens[i]:
+            if token in query_tokens:
+                continue
+            grams = trigrams(token)
+            if not any(dice(grams, q) >= self.token_threshold for q in query_grams):
+                return False
+        # Whole tokens, not substrings: "egg" must not match "veggie"
+        return all(p in self.name_tokens[i] for p in self.protected if p in query_tokens)
+
+    def canonicalize(self, items):
+        """Catalog name for every item that resolves; unresolved items are passed through unchanged."""
+        return [self.resolve(item)[0] or item for item in items]
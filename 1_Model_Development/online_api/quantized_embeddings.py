@@ -0,0 +1,91 @@
+# src/online_api/quantized_embeddings.py
+
+import json
+import os
+import numpy as np
+
+EMBEDDING_DIR = "data/embeddings"
+PRECISIONS = ("float16", "int8")
+PRECISION_ENV_VAR = "CSAO_EMBEDDING_PRECISION"
+# Affinity graph without the per-dish embedding lists, loaded by the engine in quantized mode
+GRAPH_META_FILE = "graph_meta.json"
+
+def quantize(matrix, precision):
+    """Returns (codes, scales). int8 uses one symmetric scale per vector; float16 needs none."""
+    matrix = np.asarray(matrix, dtype=np.float32)
+    if precision == "float16":
+        return matrix.astype(np.float16), None
+    if precision == "int8":
+        scales = np.abs(matrix).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+    raise ValueError(f"Unsupported embedding precision '{precision}'. Use one of {PRECISIONS}.")
+
+def approximate_scores(contexts, codes, scales=None, block_rows=4096):
+    """
+    contexts (B, D) @ codes.T, dequantizing one block of rows at a time so the
+    float32 working copy never exceeds block_rows x D regardless of catalog size.
+    """
+    contexts = np.asarray(contexts, dtype=np.float32)
+    scores = np.empty((len(contexts), len(codes)), dtype=np.float32)
+    for start in range(0, len(codes), block_rows):
+        block = np.asarray(codes[start:start + block_rows], dtype=np.float32)
+        scores[:, start:start + len(block)] = contexts @ block.T
+    if scales is not None:
+        scores *= scales
+    return scores
+
+def save_embeddings(names, matrix, precision, graph, out_dir=EMBEDDING_DIR):
+    """
+    Writes the exact float32 matrix (re-scoring, memory-mapped at serve time), the quantized codes,
+    and the affinity graph minus its embeddings so the engine never parses the float lists.
+    """
+    codes, scales = quantize(matrix, precision)
+    os.makedirs(out_dir, exist_ok=True)
+    paths = [os.path.join(out_dir, "names.json"), os.path.join(out_dir, GRAPH_META_FILE),
+             os.path.join(out_dir, "float32.npy"), os.path.join(out_dir, f"{precision}.npy")]
+    with open(paths[0], "w") as f:
+        json.dump(list(names), f)
+    with open(paths[1], "w") as f:
+        json.dump({dish: {k: v for k, v in data.items() if k != "embedding"} for dish, data in graph.items()}, f)
+    np.save(paths[2], np.asarray(matrix, dtype=np.float32))
+    np.save(paths[3], codes)
+    if scales is not None:
+        paths.append(os.path.join(out_dir, f"{precision}_scales.npy"))
+        np.save(paths[-1], scales)
+    return paths
+
+class QuantizedEmbeddings:
+    """
+    Catalog embeddings for Stage 1: quantized codes held in RAM for the full scan,
+    exact float32 vectors memory-mapped so only shortlisted rows are ever paged in.
+    """
+    def __init__(self, precision, out_dir=EMBEDDING_DIR):
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unsupported embedding precision '{precision}'. Use one of {PRECISIONS}.")
+        self.precision = precision
+        with open(os.path.join(out_dir, "names.json"), "r") as f:
+            self.names = json.load(f)
+        self.codes = np.load(os.path.join(out_dir, f"{precision}.npy"))
+        scales_path = os.path.join(out_dir, f"{precision}_scales.npy")
+        self.scales = np.load(scales_path) if os.path.exists(scales_path) else None
+        self.exact = np.load(os.path.join(out_dir, "float32.npy"), mmap_mode="r")
+
+    @classmethod
+    def exists(cls, precision, out_dir=EMBEDDING_DIR):
+        return all(os.path.exists(os.path.join(out_dir, f))
+                   for f in ("names.json", GRAPH_META_FILE, "float32.npy", f"{precision}.npy"))
+
+    @property
+    def nbytes(self):
+        """Resident bytes of the scan structures (the exact matrix is paged in on demand)."""
+        return self.codes.nbytes + (self.scales.nbytes if self.scales is not None else 0)
+
+    def score(self, contexts):
+        return approximate_scores(contexts, self.codes, self.scales)
+
+    def rescore(self, context, rows):
+        rows = np.sort(np.asarray(rows))
+        exact = np.asarray(self.exact[rows], dtype=np.float32) @ np.asarray(context, dtype=np.float32)
+        return rows, exact
@@ -0,0 +1,99 @@
+# src/reproducibility.py
+
+import hashlib
+import json
+import os
+import random
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import numpy as np
+
+# Setting CSAO_SEED switches every pipeline step into reproducible build mode
+SEED_ENV_VAR = "CSAO_SEED"
+MANIFEST_PATH = "data/artifact_manifest.json"
+FIXED_TIMESTAMP = datetime(2026, 1, 1, 12, 0, 0)
+
+def get_seed(default=None):
+    value = os.environ.get(SEED_ENV_VAR)
+    return int(value) if value not in (None, "") else default
+
+def seed_everything(seed):
+    """Seeds the global Python and NumPy RNGs. No-op when seed is None."""
+    if seed is None:
+        return
+    random.seed(seed)
+    np.random.seed(seed)
+
+def stable_hash(text):
+    """Process-independent replacement for hash(), which is salted per interpreter run."""
+    return int.from_bytes(hashlib.md5(text.encode("utf-8")).digest()[:8], "little")
+
+def build_timestamp(seed):
+    return FIXED_TIMESTAMP if seed is not None else datetime.now()
+
+def file_sha256(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+@contextmanager
+def _file_lock(lock_path):
+    """Exclusive inter-process lock held on a sidecar file for the duration of the block."""
+    with open(lock_path, "a+") as handle:
+        if fcntl:
+            fcntl.flock(handle, fcntl.LOCK_EX)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(handle, fcntl.LOCK_UN)
+            else:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+
+def record_artifacts(paths, step, seed, manifest_path=MANIFEST_PATH):
+    """
+    Adds content hashes of freshly written artifacts to the shared manifest.
+    Pipeline steps run in parallel, so the read-modify-write happens under a file lock and the
+    new manifest replaces the old one atomically (readers never see a partial file).
+    """
+    entries = {}
+    for path in paths:
+        entries[path] = {
+            "sha256": file_sha256(path),
+            "bytes": os.path.getsize(path),
+            "step": step,
+            "seed": seed
+        }
+        print(f"DEBUG: {path} sha256={entries[path]['sha256'][:16]}")
+
+    manifest_dir = os.path.dirname(manifest_path) or "."
+    os.makedirs(manifest_dir, exist_ok=True)
+    with _file_lock(manifest_path + ".lock"):
+        manifest = {}
+        if os.path.exists(manifest_path):
+            with open(manifest_path, "r") as f:
+                manifest = json.load(f)
+        manifest.update(entries)
+
+        fd, tmp_path = tempfile.mkstemp(dir=manifest_dir, prefix=".artifact_manifest.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(dict(sorted(manifest.items())), f, indent=2)
+            os.replace(tmp_path, manifest_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
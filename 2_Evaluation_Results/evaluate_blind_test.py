@@ -18,7 +18,10 @@ def run_blind_evaluation():
     # 1. Generate an entirely new "blind" dataset the model has never seen
     print("DEBUG: Generating a completely new BLIND dataset of 3,000 orders...")
     # Temporarily override the save paths in data_gen if needed, but we can just use the returned dataframe
-    df_blind = data_gen.generate_orders(num_orders=3000)
+    # In reproducible mode, offset the seed so the blind set isn't a replay of the training orders
+    seed = data_gen.get_seed()
+    # In memory only: writing it would overwrite the train/test CSVs and their manifest entries
+    df_blind = data_gen.generate_orders(num_orders=3000, seed=None if seed is None else seed + 1, write=False)
     
     # We treat this entire 3000 order set as the holdout
     positive_samples = df_blind[df_blind['added'] == 1]
@@ -0,0 +1,162 @@
+import os
+import sys
+import time
+import argparse
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# Ensure local imports work
+sys.path.append(os.getcwd())
+sys.path.append(os.path.join(os.getcwd(), "1_Model_Development"))
+
+K = 8
+RETRIEVAL_K = 50
+# Every worker holds a full engine (ranker + sentence encoder), so the default doesn't scale with cores;
+# the pipeline also runs this step next to metrics.py
+DEFAULT_MAX_WORKERS = 4
+
+_engine = None
+
+def _init_worker():
+    # Each worker process loads the engine (graph, ranker, encoder) exactly once
+    global _engine
+    from online_api.inference import TwoStageEngine
+    _engine = TwoStageEngine()
+
+def _evaluate_shard(orders, batch_size):
+    """Runs the full two-stage engine over a shard of orders and returns partial sums."""
+    stats = {"orders": 0, "evaluated": 0, "hits": 0, "mrr": 0.0, "ndcg": 0.0, "recall": 0.0,
+             "retrieved_any": 0, "hits_given_retrieved": 0, "latencies": [], "recommended": set()}
+
+    for start in range(0, len(orders), batch_size):
+        batch = orders[start:start + batch_size]
+        requests = [{k: o[k] for k in ("cart_items", "user_segment", "time_of_day", "user_id")} for o in batch]
+        t0 = time.perf_counter()
+        results = _engine.recommend_batch(requests, return_candidates=True)
+        # Amortized per-request latency of the batched engine call
+        stats["latencies"].extend([(time.perf_counter() - t0) * 1000 / len(batch)] * len(batch))
+
+        for order, (recs, candidates) in zip(batch, results):
+            stats["orders"] += 1
+            rec_items = [r["item"] for r in recs][:K]
+            stats["recommended"].update(rec_items)
+            positives = set(order["positives"])
+            if not positives:
+                continue
+
+            stats["evaluated"] += 1
+            retrieved = positives & set(candidates[:RETRIEVAL_K])
+            stats["recall"] += len(retrieved) / len(positives)
+
+            ranks = [i + 1 for i, item in enumerate(rec_items) if item in positives]
+            if ranks:
+                stats["hits"] += 1
+                stats["mrr"] += 1.0 / ranks[0]
+            dcg = sum(1.0 / np.log2(r + 1) for r in ranks)
+            idcg = sum(1.0 / np.log2(r + 1) for r in range(1, min(len(positives), K) + 1))
+            stats["ndcg"] += dcg / idcg
+
+            if retrieved:
+                stats["retrieved_any"] += 1
+                stats["hits_given_retrieved"] += 1 if ranks else 0
+    return stats
+
+def load_orders(df):
+    """One evaluation request per order_id: the cart context plus every add-on the user accepted."""
+    context = df.drop_duplicates("order_id")
+    positives = df[df["added"] == 1].groupby("order_id")["candidate_item"].agg(list).to_dict()
+    user_ids = context["user_id"] if "user_id" in context else [None] * len(context)
+    return [
+        {"cart_items": [cart], "user_segment": segment, "time_of_day": tod, "user_id": user_id,
+         "positives": positives.get(order_id, [])}
+        for order_id, cart, segment, tod, user_id in zip(
+            context["order_id"], context["cart_items"], context["user_segment"], context["time_of_day"], user_ids
+        )
+    ]
+
+def run_end_to_end_evaluation(data_path="data/recent_test_data.csv", blind=False, workers=None,
+                              shard_size=None, batch_size=32, limit=None):
+    print("===============================================================")
+    print("   ZOMATO CSAO - END-TO-END TWO-STAGE EVALUATION              ")
+    print("===============================================================")
+
+    if blind:
+        from importlib.machinery import SourceFileLoader
+        data_gen = SourceFileLoader("generate_synthetic_data", "1_Model_Development/data_prep/generate_synthetic_data.py").load_module()
+        seed = data_gen.get_seed()
+        print("DEBUG: Generating a BLIND dataset of 3,000 orders...")
+        # In memory only: writing it would overwrite the train/test CSVs and their manifest entries
+        df = data_gen.generate_orders(num_orders=3000, seed=None if seed is None else seed + 1, write=False)
+        dataset_name = "blind (3,000 fresh orders)"
+    else:
+        try:
+            df = pd.read_csv(data_path)
+        except FileNotFoundError:
+            print(f"ERROR: {data_path} not found.")
+            return
+        dataset_name = data_path
+
+    orders = load_orders(df)
+    if limit:
+        orders = orders[:limit]
+    # Default: ~4 shards per worker so stragglers don't leave cores idle at the end
+    workers = workers or min(DEFAULT_MAX_WORKERS, os.cpu_count() or 1)
+    shard_size = shard_size or max(50, -(-len(orders) // (workers * 4)))
+    shards = [orders[i:i + shard_size] for i in range(0, len(orders), shard_size)]
+    print(f"DEBUG: {len(orders):,} orders in {len(shards)} shards across {workers} workers...")
+
+    totals = {"orders": 0, "evaluated": 0, "hits": 0, "mrr": 0.0, "ndcg": 0.0, "recall": 0.0,
+              "retrieved_any": 0, "hits_given_retrieved": 0}
+    latencies, recommended = [], set()
+    wall_start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        futures = [pool.submit(_evaluate_shard, shard, batch_size) for shard in shards]
+        for done, future in enumerate(as_completed(futures), 1):
+            stats = future.result()
+            for key in totals:
+                totals[key] += stats[key]
+            latencies.extend(stats["latencies"])
+            recommended.update(stats["recommended"])
+            print(f"  shard {done}/{len(shards)} | orders so far: {totals['orders']:,}")
+    wall = time.perf_counter() - wall_start
+
+    n = max(totals["evaluated"], 1)
+    catalog_size = df["candidate_item"].nunique()
+    report = f"""================ END-TO-END TWO-STAGE METRICS ================
+Dataset                     : {dataset_name}
+Orders run through engine   : {totals['orders']:,} ({totals['evaluated']:,} with an accepted add-on)
+---- Stage 1: Retrieval ----
+Recall @ {RETRIEVAL_K}                 : {totals['recall'] / n:.4f}  | Accepted add-ons present in the candidate set
+Orders with any hit @ {RETRIEVAL_K}    : {totals['retrieved_any'] / n:.2%}
+---- Stage 2: Ranking (final top {K}) ----
+HitRate @ {K}                 : {totals['hits'] / n:.4f}
+NDCG @ {K}                    : {totals['ndcg'] / n:.4f}
+MRR                         : {totals['mrr'] / n:.4f}
+HitRate @ {K} | retrieved     : {totals['hits_given_retrieved'] / max(totals['retrieved_any'], 1):.4f}  | Ranking quality when Stage 1 found a positive
+---- Operational ----
+Mean request latency        : {np.mean(latencies):.2f} ms (batched x{batch_size}, amortized)
+P99 request latency         : {np.percentile(latencies, 99):.2f} ms
+Wall time                   : {wall:.1f} s ({totals['orders'] / wall:.0f} orders/s)
+Catalog coverage            : {len(recommended) / catalog_size:.2%}
+=============================================================="""
+    print(report)
+
+    out_dir = "2_Evaluation_Results"
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "end_to_end_metrics.txt"), "w", encoding="utf-8") as f:
+        f.write(report)
+    print(f"Saved results to {out_dir}/end_to_end_metrics.txt")
+    return totals
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the full retrieval + ranking engine over an entire dataset.")
+    parser.add_argument("--data", default="data/recent_test_data.csv")
+    parser.add_argument("--blind", action="store_true", help="Evaluate on a freshly generated blind set instead")
+    parser.add_argument("--workers", type=int, default=None, help=f"Defaults to min({DEFAULT_MAX_WORKERS}, CPU count)")
+    parser.add_argument("--shard-size", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--limit", type=int, default=None, help="Only evaluate the first N orders")
+    args = parser.parse_args()
+    run_end_to_end_evaluation(args.data, blind=args.blind, workers=args.workers, shard_size=args.shard_size,
+                              batch_size=args.batch_size, limit=args.limit)
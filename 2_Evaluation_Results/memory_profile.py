@@ -0,0 +1,224 @@
+import gc
+import json
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+import numpy as np
+import pandas as pd
+
+# Ensure local imports work
+sys.path.append(os.getcwd())
+sys.path.append(os.path.join(os.getcwd(), "1_Model_Development"))
+
+TOP_SITES = 15
+
+def rss_bytes():
+    """Current resident set size of this process (psutil if installed, else /proc)."""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # Last resort: peak RSS (KiB on Linux), so deltas become "growth of the high-water mark"
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def logical_sizes(engine):
+    """Bytes held by the engine's big objects, independent of what the allocator has resident."""
+    sizes = {
+        "dish_matrix": int(engine.dish_matrix.nbytes),
+        "ranker_model_string": len(engine.model.booster_.model_to_string()),
+        "graph_embeddings_as_lists": sum(
+            sys.getsizeof(d["embedding"]) + sum(sys.getsizeof(v) for v in d["embedding"])
+            for d in engine.graph.values() if "embedding" in d
+        )
+    }
+    if engine.embeddings is not None:
+        sizes["quantized_codes"] = int(engine.embeddings.nbytes)
+    if engine.encoder is not None:
+        sizes["sentence_encoder_parameters"] = int(sum(p.numel() * p.element_size() for p in engine.encoder.parameters()))
+    return sizes
+
+def load_carts(engine, data_path, num_requests, seed):
+    """Sample (cart, segment, time_of_day, user_id) requests from the test set, else from the catalog."""
+    rng = np.random.default_rng(seed)
+    if os.path.exists(data_path):
+        orders = pd.read_csv(data_path).drop_duplicates("order_id")
+        orders = orders.sample(n=min(num_requests, len(orders)), random_state=seed)
+        user_ids = orders["user_id"] if "user_id" in orders else [None] * len(orders)
+        return [
+            {"cart_items": [cart], "user_segment": segment, "time_of_day": tod, "user_id": user_id}
+            for cart, segment, tod, user_id in zip(orders["cart_items"], orders["user_segment"],
+                                                   orders["time_of_day"], user_ids)
+        ]
+    names = engine.dish_names
+    return [{"cart_items": [names[i] for i in rng.choice(len(names), size=rng.integers(1, 4), replace=False)],
+             "user_segment": "Budget", "time_of_day": "Lunch", "user_id": None}
+            for _ in range(num_requests)]
+
+def profile_load():
+    """Loads the engine step by step, attributing the RSS growth of each step to its component."""
+    from online_api.inference import TwoStageEngine
+
+    components = []
+    state = {"rss": rss_bytes(), "t": time.perf_counter()}
+
+    def on_loaded(component):
+        gc.collect()
+        rss, now = rss_bytes(), time.perf_counter()
+        components.append({"component": component, "rss_delta_mb": (rss - state["rss"]) / 1e6,
+                           "load_seconds": now - state["t"]})
+        state["rss"], state["t"] = rss, now
+
+    baseline = state["rss"]
+    engine = TwoStageEngine(load_hook=on_loaded)
+    gc.collect()
+    return engine, {"baseline_rss_mb": baseline / 1e6, "engine_rss_mb": rss_bytes() / 1e6,
+                    "components": components}
+
+def _site(stat):
+    frame = stat.traceback[0]
+    return f"{frame.filename}:{frame.lineno}"
+
+def profile_requests(engine, carts, warmup):
+    """
+    Replays carts under tracemalloc in two passes.
+
+    Pass 1 measures per-request peak and retained bytes with the traced-memory counters only, so no
+    snapshot inflates the peak. Pass 2 takes a snapshot inside every request, when LightGBM predict
+    returns (candidates, feature rows and the ranker frame are all alive). Diffing it against the
+    pre-request snapshot gives what the request has allocated and still holds at that point, per site.
+    The profiler's own lines and tracemalloc are filtered out.
+    """
+    for req in carts[:warmup]:
+        engine.recommend(**req)
+
+    filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__),
+               tracemalloc.Filter(False, "<frozen *>"), tracemalloc.Filter(False, "<unknown>")]
+
+    def snapshot():
+        return tracemalloc.take_snapshot().filter_traces(filters)
+
+    tracemalloc.start(10)
+    peaks, retained, latencies = [], [], []
+    for req in carts:
+        gc.collect()
+        tracemalloc.reset_peak()
+        start_bytes = tracemalloc.get_traced_memory()[0]
+        t0 = time.perf_counter()
+        engine.recommend(**req)
+        latencies.append((time.perf_counter() - t0) * 1000)
+        current, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - start_bytes)
+        retained.append(current - start_bytes)
+
+    # Probe: an instance attribute shadows LGBMRanker.predict for the duration of pass 2
+    probe = {}
+    original_predict = engine.model.predict
+
+    def probed_predict(*args, **kwargs):
+        result = original_predict(*args, **kwargs)
+        probe["snapshot"] = snapshot()
+        return result
+
+    engine.model.predict = probed_predict
+    in_flight_kb, in_flight_blocks, retained_blocks = [], [], []
+    sites = {}
+    try:
+        for req in carts:
+            gc.collect()
+            before = snapshot()
+            engine.recommend(**req)
+            during = probe.pop("snapshot").compare_to(before, "lineno")
+            after = snapshot().compare_to(before, "lineno")
+
+            grown = [s for s in during if s.size_diff > 0 or s.count_diff > 0]
+            in_flight_kb.append(sum(max(s.size_diff, 0) for s in grown) / 1024)
+            in_flight_blocks.append(sum(max(s.count_diff, 0) for s in grown))
+            retained_blocks.append(sum(s.count_diff for s in after))
+            for s in grown:
+                site = sites.setdefault(_site(s), {"size_kb": 0.0, "blocks": 0})
+                site["size_kb"] += max(s.size_diff, 0) / 1024
+                site["blocks"] += max(s.count_diff, 0)
+    finally:
+        del engine.model.predict
+        tracemalloc.stop()
+
+    def top(key):
+        ranked = sorted(sites.items(), key=lambda item: item[1][key], reverse=True)[:TOP_SITES]
+        return [{"site": site, "size_kb_per_request": v["size_kb"] / len(carts),
+                 "blocks_per_request": v["blocks"] / len(carts)} for site, v in ranked]
+
+    def summary(values, scale):
+        values = np.asarray(values, dtype=np.float64) / scale
+        return {"mean": float(values.mean()), "p50": float(np.percentile(values, 50)),
+                "p99": float(np.percentile(values, 99)), "max": float(values.max())}
+
+    return {
+        "requests": len(carts),
+        "warmup_requests": warmup,
+        "probe_point": "after LightGBM predict, inside the request",
+        "peak_alloc_kb": summary(peaks, 1024),
+        "retained_kb": summary(retained, 1024),
+        "in_flight_kb_at_probe": summary(in_flight_kb, 1),
+        "in_flight_blocks_at_probe": summary(in_flight_blocks, 1),
+        "retained_blocks": summary(retained_blocks, 1),
+        "latency_ms_under_tracemalloc": summary(latencies, 1),
+        "top_sites_by_size_at_probe": top("size_kb"),
+        "top_sites_by_blocks_at_probe": top("blocks")
+    }
+
+def run_profile(data_path="data/recent_test_data.csv", num_requests=200, warmup=20, seed=42,
+                out_path="2_Evaluation_Results/memory_profile.json"):
+    print("DEBUG: Profiling TwoStageEngine memory (load breakdown + request replay)...")
+    engine, load = profile_load()
+    load["logical_bytes"] = logical_sizes(engine)
+
+    carts = load_carts(engine, data_path, num_requests, seed)
+    print(f"DEBUG: Replaying {len(carts)} carts under tracemalloc ({warmup} warm-up)...")
+    rss_before = rss_bytes()
+    requests = profile_requests(engine, carts, warmup)
+    requests["rss_growth_mb"] = (rss_bytes() - rss_before) / 1e6
+
+    profile = {"pid": os.getpid(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+               "embedding_precision": os.environ.get("CSAO_EMBEDDING_PRECISION", "float"),
+               "load": load, "requests": requests}
+
+    print("================ ENGINE MEMORY PROFILE ================")
+    print(f"RSS before load : {load['baseline_rss_mb']:.1f} MB | after load: {load['engine_rss_mb']:.1f} MB")
+    for c in load["components"]:
+        print(f"  {c['component']:<22} {c['rss_delta_mb']:>8.1f} MB  {c['load_seconds']:>6.2f} s")
+    for name, size in load["logical_bytes"].items():
+        print(f"  [logical] {name:<27} {size / 1e6:>8.2f} MB")
+    print(f"Per request     : peak {requests['peak_alloc_kb']['mean']:.1f} KB (p99 {requests['peak_alloc_kb']['p99']:.1f}), "
+          f"in flight at predict {requests['in_flight_kb_at_probe']['mean']:.1f} KB / "
+          f"{requests['in_flight_blocks_at_probe']['mean']:.0f} blocks, retained {requests['retained_kb']['mean']:.2f} KB")
+    print(f"RSS growth over replay: {requests['rss_growth_mb']:.2f} MB")
+    print("Top allocation sites per request (live at predict):")
+    for s in requests["top_sites_by_size_at_probe"][:5]:
+        print(f"  {s['size_kb_per_request']:>9.1f} KB {s['blocks_per_request']:>8.1f} blocks  {s['site']}")
+    print("=======================================================")
+
+    os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
+    with open(out_path, "w") as f:
+        json.dump(profile, f, indent=2)
+    print(f"Saved results to {out_path}")
+    return profile
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-component RSS and per-request allocation profile of the serving engine.")
+    parser.add_argument("--data", default="data/recent_test_data.csv", help="Orders to sample replay carts from")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--out", default="2_Evaluation_Results/memory_profile.json")
+    args = parser.parse_args()
+    run_profile(args.data, num_requests=args.requests, warmup=args.warmup, out_path=args.out)
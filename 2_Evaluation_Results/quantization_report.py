@@ -0,0 +1,117 @@
+import json
+import os
+import sys
+import time
+import argparse
+import numpy as np
+
+# Ensure local imports work
+sys.path.append(os.getcwd())
+sys.path.append(os.path.join(os.getcwd(), "1_Model_Development", "online_api"))
+from quantized_embeddings import quantize, approximate_scores
+
+K = 50
+RESCORE_FACTOR = 4
+
+def load_catalog(path="data/regional_affinity_map.json"):
+    with open(path, "r") as f:
+        graph = json.load(f)
+    names = list(graph.keys())
+    matrix = np.array([graph[n]["embedding"] for n in names], dtype=np.float64)
+    popularity = np.array([graph[n].get("popularity", 0.0) for n in names])
+    return matrix / (np.linalg.norm(matrix, axis=1, keepdims=True) + 1e-9), popularity
+
+def scale_catalog(matrix, popularity, num_rows, rng):
+    """Synthesizes a larger catalog by jittering real dish vectors, to measure memory/latency at scale."""
+    if num_rows <= len(matrix):
+        return matrix, popularity
+    src = rng.integers(0, len(matrix), num_rows - len(matrix))
+    extra = matrix[src] + rng.normal(0, 0.05, (len(src), matrix.shape[1]))
+    extra /= np.linalg.norm(extra, axis=1, keepdims=True)
+    return np.vstack([matrix, extra]), np.concatenate([popularity, popularity[src]])
+
+def sample_contexts(matrix, num_queries, rng):
+    """Half single-item carts, half two-item carts pooled like the engine's context vector."""
+    a = matrix[rng.integers(0, len(matrix), num_queries)]
+    b = matrix[rng.integers(0, len(matrix), num_queries)]
+    pairs = 0.5 * a + 0.5 * b
+    contexts = np.where((np.arange(num_queries) % 2 == 0)[:, None], a, pairs)
+    return contexts / np.linalg.norm(contexts, axis=1, keepdims=True)
+
+def top_k(scores, k):
+    idx = np.argpartition(-scores, k)[:k]
+    return idx[np.argsort(-scores[idx], kind="stable")]
+
+def evaluate(precision, matrix, popularity, contexts, truth):
+    exact32 = matrix.astype(np.float32)
+    if precision == "float64":
+        codes, scales, resident = matrix, None, matrix.nbytes
+    else:
+        codes, scales = quantize(matrix, precision)
+        resident = codes.nbytes + (scales.nbytes if scales is not None else 0)
+
+    approx_recall, rescored_recall, latencies = [], [], []
+    for context, expected in zip(contexts, truth):
+        start = time.perf_counter()
+        if precision == "float64":
+            scores = matrix @ context
+        else:
+            scores = approximate_scores(context[None, :], codes, scales)[0]
+        adjusted = scores - 0.1 * popularity
+        approx = top_k(adjusted, K)
+        if precision != "float64":
+            shortlist = np.sort(top_k(adjusted, K * RESCORE_FACTOR))
+            exact = exact32[shortlist] @ context.astype(np.float32) - 0.1 * popularity[shortlist]
+            final = shortlist[top_k(exact, K)]
+        else:
+            final = approx
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        expected = set(expected.tolist())
+        approx_recall.append(len(expected & set(approx.tolist())) / K)
+        rescored_recall.append(len(expected & set(final.tolist())) / K)
+
+    return {
+        "precision": precision,
+        "resident_mb": resident / 1e6,
+        "recall_approx": float(np.mean(approx_recall)),
+        "recall_rescored": float(np.mean(rescored_recall)),
+        "latency_ms_mean": float(np.mean(latencies)),
+        "latency_ms_p99": float(np.percentile(latencies, 99))
+    }
+
+def run_report(num_rows=None, num_queries=200, seed=42):
+    print("DEBUG: Comparing full-precision vs quantized Stage 1 retrieval...")
+    rng = np.random.default_rng(seed)
+    matrix, popularity = load_catalog()
+    matrix, popularity = scale_catalog(matrix, popularity, num_rows or len(matrix), rng)
+    contexts = sample_contexts(matrix, num_queries, rng)
+    truth = [top_k(matrix @ c - 0.1 * popularity, K) for c in contexts]
+
+    rows = [evaluate(p, matrix, popularity, contexts, truth) for p in ("float64", "float16", "int8")]
+
+    lines = ["================ EMBEDDING QUANTIZATION REPORT ================",
+             f"Catalog rows: {len(matrix):,} x {matrix.shape[1]} dims | Queries: {num_queries} | "
+             f"Recall@{K} vs exact float64 | Re-score shortlist: {K * RESCORE_FACTOR}",
+             f"{'Precision':<10} {'Resident MB':>12} {'Recall(scan)':>13} {'Recall(+rescore)':>17} "
+             f"{'Mean ms':>9} {'P99 ms':>9}"]
+    for r in rows:
+        lines.append(f"{r['precision']:<10} {r['resident_mb']:>12.2f} {r['recall_approx']:>13.4f} "
+                     f"{r['recall_rescored']:>17.4f} {r['latency_ms_mean']:>9.3f} {r['latency_ms_p99']:>9.3f}")
+    lines.append("===============================================================")
+    report = "\n".join(lines)
+    print(report)
+
+    out_dir = "2_Evaluation_Results"
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "quantization_metrics.txt"), "w") as f:
+        f.write(report)
+    print(f"Saved results to {out_dir}/quantization_metrics.txt")
+    return rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall/latency/memory of quantized Stage 1 embeddings.")
+    parser.add_argument("--rows", type=int, default=None, help="Synthesize a catalog of this many rows (e.g. 300000)")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    run_report(num_rows=args.rows, num_queries=args.queries)
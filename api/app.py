@@ -13,6 +13,13 @@ from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
 from typing import List, Optional
 import uvicorn
+import asyncio
+import random
+import threading
+import time
+import numpy as np
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # Import inference engine
@@ -26,8 +33,191 @@ print("Loading Recommendation Engine into memory...")
 engine = TwoStageEngine()
 print("Engine loaded successfully!")
 
+# Micro-batching: concurrent requests are coalesced for up to MAX_WAIT_MS and scored
+# together on a single worker thread, so one LightGBM predict serves the whole batch
+MAX_BATCH_SIZE = int(os.environ.get("CSAO_MAX_BATCH_SIZE", "32"))
+MAX_WAIT_MS = float(os.environ.get("CSAO_MAX_WAIT_MS", "3"))
+
+class MicroBatcher:
+    def __init__(self, engine, max_batch_size=MAX_BATCH_SIZE, max_wait_ms=MAX_WAIT_MS):
+        self.engine = engine
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000.0
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="csao-batch")
+        self.queue = None
+        self.task = None
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task:
+            self.task.cancel()
+        self.executor.shutdown(wait=False)
+
+    async def submit(self, **kwargs):
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((kwargs, future))
+        return await future
+
+    def _process(self, batch):
+        requests = [kwargs for kwargs, _ in batch]
+        try:
+            return [(res, None) for res in self.engine.recommend_batch(requests)]
+        except Exception:
+            # One bad request must not fail its neighbours, so retry them individually
+            outcomes = []
+            for kwargs in requests:
+                try:
+                    outcomes.append((self.engine.recommend(**kwargs), None))
+                except Exception as e:
+                    outcomes.append((None, e))
+            return outcomes
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0: break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            outcomes = await loop.run_in_executor(self.executor, self._process, batch)
+            for (_, future), (result, error) in zip(batch, outcomes):
+                if future.done(): continue
+                if error is not None: future.set_exception(error)
+                else: future.set_result(result)
+
+batcher = MicroBatcher(engine)
+
+# Shadow mode: a candidate engine (re-trained artifacts in another data dir and/or a different
+# embedding precision) re-scores a sample of live requests off the request path. Disabled unless
+# CSAO_SHADOW_SAMPLE_RATE > 0 and a candidate is configured.
+SHADOW_SAMPLE_RATE = float(os.environ.get("CSAO_SHADOW_SAMPLE_RATE", "0"))
+SHADOW_DATA_PATH = os.environ.get("CSAO_SHADOW_DATA_PATH")
+SHADOW_PRECISION = os.environ.get("CSAO_SHADOW_PRECISION")
+SHADOW_BUFFER_SIZE = int(os.environ.get("CSAO_SHADOW_BUFFER_SIZE", "1000"))
+SHADOW_MAX_PENDING = 64
+STAGES = ["encode_ms", "retrieval_ms", "features_ms", "ranking_ms", "total_ms"]
+
+def rank_correlation(primary_items, candidate_items):
+    """Spearman correlation of the positions of items both lists share (None if fewer than 2)."""
+    candidate_pos = {item: i for i, item in enumerate(candidate_items)}
+    pairs = [(i, candidate_pos[item]) for i, item in enumerate(primary_items) if item in candidate_pos]
+    if len(pairs) < 2:
+        return None
+    ranks = np.argsort(np.argsort(np.array(pairs), axis=0), axis=0).astype(np.float64)
+    d = ranks[:, 0] - ranks[:, 1]
+    n = len(pairs)
+    return float(1 - 6 * (d ** 2).sum() / (n * (n ** 2 - 1)))
+
+class ShadowRunner:
+    def __init__(self, primary, candidate, sample_rate=SHADOW_SAMPLE_RATE,
+                 buffer_size=SHADOW_BUFFER_SIZE, max_pending=SHADOW_MAX_PENDING):
+        self.primary = primary
+        self.candidate = candidate
+        self.sample_rate = sample_rate
+        self.max_pending = max_pending
+        self.records = deque(maxlen=buffer_size)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="csao-shadow")
+        self.lock = threading.Lock()
+        self.rng = random.Random()
+        self.pending = self.sampled = self.dropped = 0
+
+    def maybe_submit(self, request_kwargs, served):
+        """Called on the event loop after the response is ready; never waits on the candidate."""
+        if self.rng.random() >= self.sample_rate:
+            return
+        with self.lock:
+            if self.pending >= self.max_pending:
+                # Shadow work is best-effort: shed it rather than queue behind a slow candidate
+                self.dropped += 1
+                return
+            self.pending += 1
+            self.sampled += 1
+            # Decided at submit time so consecutive samples alternate even when they queue up
+            candidate_first = self.sampled % 2 == 0
+        self.executor.submit(self._compare, dict(request_kwargs), served, candidate_first)
+
+    def _compare(self, request_kwargs, served, candidate_first):
+        record = {"timestamp": time.time(), "cart": request_kwargs["cart_items"]}
+        try:
+            # Both engines time the same single request on the same thread, so stage deltas are paired;
+            # the run order alternates so warm caches don't systematically favour the second engine
+            primary_timings, candidate_timings = {}, {}
+            if candidate_first:
+                shadow_results = self.candidate.recommend_batch([request_kwargs], timings=candidate_timings)[0]
+            self.primary.recommend_batch([request_kwargs], timings=primary_timings)
+            if not candidate_first:
+                shadow_results = self.candidate.recommend_batch([request_kwargs], timings=candidate_timings)[0]
+
+            primary_items = [r["item"] for r in served]
+            candidate_items = [r["item"] for r in shadow_results]
+            record.update({
+                "latency_delta_ms": {stage: candidate_timings.get(stage, 0.0) - primary_timings.get(stage, 0.0)
+                                     for stage in STAGES},
+                "primary_total_ms": primary_timings.get("total_ms", 0.0),
+                "candidate_total_ms": candidate_timings.get("total_ms", 0.0),
+                "top8_overlap": len(set(primary_items) & set(candidate_items)) / max(len(primary_items), 1),
+                "rank_correlation": rank_correlation(primary_items, candidate_items),
+                "primary_top8": primary_items,
+                "candidate_top8": candidate_items
+            })
+        except Exception as e:
+            record["error"] = str(e)
+        finally:
+            with self.lock:
+                self.pending -= 1
+        self.records.append(record)
+
+    def summary(self, recent=20):
+        records = list(self.records)
+        ok = [r for r in records if "error" not in r]
+        report = {"sample_rate": self.sample_rate, "sampled": self.sampled, "dropped": self.dropped,
+                  "pending": self.pending, "buffered": len(records), "errors": len(records) - len(ok)}
+        if ok:
+            correlations = [r["rank_correlation"] for r in ok if r["rank_correlation"] is not None]
+            report["top8_overlap_mean"] = float(np.mean([r["top8_overlap"] for r in ok]))
+            report["rank_correlation_mean"] = float(np.mean(correlations)) if correlations else None
+            report["latency_delta_ms"] = {}
+            for stage in STAGES:
+                deltas = [r["latency_delta_ms"][stage] for r in ok]
+                report["latency_delta_ms"][stage] = {"mean": float(np.mean(deltas)), "p50": float(np.percentile(deltas, 50)),
+                                                     "p99": float(np.percentile(deltas, 99))}
+        report["recent"] = records[-recent:] if recent > 0 else []
+        return report
+
+    def stop(self):
+        self.executor.shutdown(wait=False)
+
+shadow = None
+if SHADOW_SAMPLE_RATE > 0 and (SHADOW_DATA_PATH or SHADOW_PRECISION):
+    print("Loading shadow candidate engine...")
+    shadow = ShadowRunner(engine, TwoStageEngine(data_path=SHADOW_DATA_PATH, precision=SHADOW_PRECISION))
+    print(f"Shadow mode enabled on {SHADOW_SAMPLE_RATE:.1%} of traffic")
+
+@app.on_event("startup")
+async def start_batcher():
+    batcher.start()
+
+@app.on_event("shutdown")
+async def stop_batcher():
+    await batcher.stop()
+    if shadow:
+        shadow.stop()
+
 class RecommendationRequest(BaseModel):
     cart_items: List[str]
+    user_id: Optional[str] = None
 
 app.mount("/static", StaticFiles(directory=os.path.join(base_dir, "api", "static")), name="static")
 templates = Jinja2Templates(directory=os.path.join(base_dir, "api", "templates"))
@@ -43,15 +233,22 @@ async def recommend(request: RecommendationRequest):
         if hour < 17: time_of_day = "Lunch"
         else: time_of_day = "Dinner"
             
-        user_segment = "Premium"
+        # Segment, veg ratio and order frequency come from the feature store for known users;
+        # anonymous requests and ids without a stored profile keep the Premium default
+        known_user = (request.user_id and engine.feature_store is not None
+                      and engine.feature_store.user_features(request.user_id) is not None)
+        user_segment = None if known_user else "Premium"
         
-        # We pre-loaded the engine, so inference should just be standard forward passes
-        # <200ms target should easily be met
-        results = engine.recommend(
-            request.cart_items, 
-            user_segment, 
-            time_of_day
-        )
+        # Coalesced with other in-flight requests; the event loop never blocks on the model
+        request_kwargs = {
+            "cart_items": request.cart_items,
+            "user_segment": user_segment,
+            "time_of_day": time_of_day,
+            "user_id": request.user_id
+        }
+        results = await batcher.submit(**request_kwargs)
+        if shadow:
+            shadow.maybe_submit(request_kwargs, results)
         return {
             "cart": request.cart_items,
             "recommendations": results,
@@ -60,5 +257,11 @@ async def recommend(request: RecommendationRequest):
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
+@app.get("/api/shadow")
+async def shadow_report(recent: int = 20):
+    if not shadow:
+        return {"status": "disabled"}
+    return {"status": "success", "shadow": shadow.summary(recent)}
+
 if __name__ == "__main__":
     uvicorn.run(app, host="127.0.0.1", port=8000)
@@ -3,26 +3,238 @@
 import subprocess
 import sys
 import os
+import json
+import time
+import argparse
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 
-def run_step(command, description):
-    print(f"\n>>> STEP: {description}")
-    print(f"Executing: {command}")
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "1_Model_Development"))
+from reproducibility import SEED_ENV_VAR, file_sha256
+from online_api.quantized_embeddings import EMBEDDING_DIR, GRAPH_META_FILE, PRECISION_ENV_VAR, PRECISIONS
+
+CACHE_PATH = "data/.pipeline_cache.json"
+# Environment variables that change what the steps produce
+FINGERPRINT_ENV_VARS = [SEED_ENV_VAR, PRECISION_ENV_VAR]
+# Every file the engine reads from the feature store (user_keys.json only exists for non-U_<n> ids)
+FEATURE_STORE_FILES = [f"data/feature_store/{name}" for name in [
+    "meta.json", "user_index.npy", "user_keys.json", "item_names.json", "item_price.npy",
+    "user_veg_ratio.npy", "user_segment.npy", "user_frequency.npy", "user_order_count.npy",
+    "user_avg_cart_value.npy"
+]]
+
+def embedding_files(precision=None):
+    """Quantized embeddings build_graph writes (and the engine loads) when $CSAO_EMBEDDING_PRECISION is set."""
+    precision = precision or os.environ.get(PRECISION_ENV_VAR)
+    if precision not in PRECISIONS:
+        return []
+    names = ["names.json", GRAPH_META_FILE, "float32.npy", f"{precision}.npy"]
+    if precision == "int8":
+        names.append("int8_scales.npy")
+    return [f"{EMBEDDING_DIR}/{name}" for name in names]
+
+EMBEDDING_FILES = embedding_files()
+_print_lock = threading.Lock()
+_hash_memo = {}
+
+# Each step declares what it reads and writes. A step is skipped when the fingerprint of its
+# code + inputs matches the last successful run and its outputs are still on disk.
+STEPS = [
+    {
+        "name": "generate_data",
+        "description": "Generating 15k Synthetic Orders",
+        "script": "1_Model_Development/data_prep/generate_synthetic_data.py",
+        "code": ["1_Model_Development/reproducibility.py"],
+        "inputs": [],
+        "outputs": ["data/synthetic_orders.csv", "data/historical_train_data.csv", "data/recent_test_data.csv"],
+        "deps": []
+    },
+    {
+        "name": "build_graph",
+        "description": "Building regional Knowledge Graph",
+        "script": "1_Model_Development/offline_pipeline/build_graph.py",
+        "code": ["1_Model_Development/reproducibility.py", "1_Model_Development/online_api/quantized_embeddings.py"],
+        "inputs": ["data/synthetic_orders.csv"],
+        "outputs": ["data/regional_affinity_map.json"] + EMBEDDING_FILES,
+        "deps": ["generate_data"]
+    },
+    {
+        "name": "train_ranker",
+        "description": "Training Two-Stage ML Ranker",
+        "script": "1_Model_Development/offline_pipeline/train_ranker.py",
+        "code": ["1_Model_Development/reproducibility.py"],
+        "inputs": ["data/synthetic_orders.csv", "data/regional_affinity_map.json"],
+        "outputs": ["data/ranker_model.pkl"],
+        "deps": ["generate_data", "build_graph"]
+    },
+    {
+        "name": "complement_store",
+        "description": "Converting Complement Graph to CSR",
+        "script": "1_Model_Development/offline_pipeline/build_complement_store.py",
+        "code": ["1_Model_Development/online_api/complement_store.py", "1_Model_Development/reproducibility.py"],
+        "inputs": ["data/processed/complementary_mapping.json", "data/processed/name_to_id.pkl"],
+        "outputs": ["data/processed/complement_csr/meta.json", "data/processed/complement_csr/indptr.npy",
+                    "data/processed/complement_csr/indices.npy"],
+        "deps": []
+    },
+    {
+        "name": "feature_store",
+        "description": "Building User/Item Feature Store",
+        "script": "1_Model_Development/offline_pipeline/build_feature_store.py",
+        "code": ["1_Model_Development/online_api/feature_store.py", "1_Model_Development/reproducibility.py"],
+        "inputs": ["data/synthetic_orders.csv"],
+        "outputs": [path for path in FEATURE_STORE_FILES if not path.endswith("user_keys.json")],
+        "deps": ["generate_data"]
+    },
+    {
+        "name": "evaluate",
+        "description": "Running Performance Evaluation",
+        "script": "2_Evaluation_Results/metrics.py",
+        "code": ["1_Model_Development/online_api/inference.py", "1_Model_Development/online_api/quantized_embeddings.py",
+                 "1_Model_Development/online_api/feature_store.py", "1_Model_Development/online_api/name_resolver.py"],
+        "inputs": ["data/recent_test_data.csv", "data/regional_affinity_map.json", "data/ranker_model.pkl"]
+                  + FEATURE_STORE_FILES + EMBEDDING_FILES,
+        "outputs": [
+            "2_Evaluation_Results/model_performance_metrics.txt",
+            "2_Evaluation_Results/business_impact_metrics.txt",
+            "2_Evaluation_Results/operational_metrics.txt"
+        ],
+        "deps": ["train_ranker", "feature_store"]
+    },
+    {
+        "name": "evaluate_e2e",
+        "description": "Running End-to-End Two-Stage Evaluation",
+        "script": "2_Evaluation_Results/evaluate_end_to_end.py",
+        "code": ["1_Model_Development/online_api/inference.py", "1_Model_Development/online_api/quantized_embeddings.py",
+                 "1_Model_Development/online_api/feature_store.py", "1_Model_Development/online_api/name_resolver.py"],
+        "inputs": ["data/recent_test_data.csv", "data/regional_affinity_map.json", "data/ranker_model.pkl"]
+                  + FEATURE_STORE_FILES + EMBEDDING_FILES,
+        "outputs": ["2_Evaluation_Results/end_to_end_metrics.txt"],
+        "deps": ["train_ranker", "feature_store"]
+    }
+]
+
+def log(message):
+    with _print_lock:
+        print(message, flush=True)
+
+def content_hash(path):
+    """sha256 of a file, memoized on (size, mtime) so shared inputs are read once per run."""
+    if not os.path.exists(path):
+        return "missing"
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    if key not in _hash_memo:
+        _hash_memo[key] = file_sha256(path)
+    return _hash_memo[key]
+
+def fingerprint(step):
+    """Hash of the step's script, helper code, input artifacts and build-affecting environment."""
+    digest = hashlib.sha256()
+    digest.update(step["name"].encode())
+    for var in FINGERPRINT_ENV_VARS:
+        digest.update(f"{var}={os.environ.get(var, '')}".encode())
+    for path in [step["script"]] + step["code"] + step["inputs"]:
+        digest.update(path.encode())
+        digest.update(content_hash(path).encode())
+    return digest.hexdigest()
+
+def load_cache():
+    if os.path.exists(CACHE_PATH):
+        with open(CACHE_PATH, "r") as f:
+            return json.load(f)
+    return {}
+
+def save_cache(cache):
+    os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+    with open(CACHE_PATH, "w") as f:
+        json.dump(cache, f, indent=2)
+
+def run_step(step):
+    command = step["script"]
+    description = step["description"]
+    log(f"\n>>> STEP: {description}")
+    log(f"Executing: {command}")
     try:
         # Using sys.executable to ensure we use the same python environment
         process = subprocess.Popen([sys.executable] + command.split(), stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
         for line in process.stdout:
-            print(f"  {line.strip()}")
+            log(f"  [{step['name']}] {line.strip()}")
         process.wait()
         if process.returncode != 0:
-            print(f"❌ ERROR in {description}")
+            log(f"❌ ERROR in {description}")
             return False
-        print(f"✅ SUCCESS: {description} completed.")
+        log(f"✅ SUCCESS: {description} completed.")
         return True
     except Exception as e:
-        print(f"❌ CRITICAL ERROR: {e}")
+        log(f"❌ CRITICAL ERROR: {e}")
         return False
 
+def execute_step(step, cache, force):
+    """Runs (or skips) one step. Returns (status, wall_seconds, cache_entry)."""
+    start = time.perf_counter()
+    fp = fingerprint(step)
+    entry = cache.get(step["name"], {})
+    # Outputs must also be the ones we produced, not files edited or overwritten since
+    if not force and entry.get("fingerprint") == fp and all(
+        entry.get("outputs", {}).get(p) == content_hash(p) for p in step["outputs"]
+    ):
+        log(f"\n>>> STEP: {step['description']} — up to date, skipping.")
+        return "cached", time.perf_counter() - start, entry
+    ok = run_step(step)
+    entry = {"fingerprint": fp, "outputs": {p: content_hash(p) for p in step["outputs"]}}
+    return ("ran" if ok else "failed"), time.perf_counter() - start, entry
+
+def run_pipeline(steps=STEPS, force=False, jobs=2):
+    cache = load_cache()
+    by_name = {s["name"]: s for s in steps}
+    pending = set(by_name)
+    done, results = set(), {}
+    failed = False
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        running = {}
+        while pending or running:
+            # Launch every step whose dependencies have all finished
+            if not failed:
+                for name in sorted(pending):
+                    if all(dep in done for dep in by_name[name]["deps"]):
+                        running[pool.submit(execute_step, by_name[name], cache, force)] = name
+                pending -= set(running.values())
+            if not running:
+                break
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                name = running.pop(future)
+                status, seconds, entry = future.result()
+                results[name] = (status, seconds)
+                if status == "failed":
+                    failed = True
+                    continue
+                done.add(name)
+                cache[name] = entry
+                save_cache(cache)
+
+    return results, not failed and not pending
+
+def print_timings(results):
+    print("\n---------------- STEP TIMINGS ----------------")
+    for step in STEPS:
+        if step["name"] in results:
+            status, seconds = results[step["name"]]
+            print(f"  {step['name']:<16} {status:<8} {seconds:8.2f}s")
+        else:
+            print(f"  {step['name']:<16} {'skipped':<8} {'-':>8}")
+    print("----------------------------------------------")
+
 def main():
+    parser = argparse.ArgumentParser(description="Run the CSAO offline pipeline.")
+    parser.add_argument("--force", action="store_true", help="Re-run every step, ignoring the cache")
+    parser.add_argument("--jobs", type=int, default=2, help="Maximum number of steps to run in parallel")
+    args = parser.parse_args()
+
     print("====================================================")
     print("   ZOMATO CSAO HACKATHON - FULL PIPELINE RUNNER     ")
     print("====================================================")
@@ -30,17 +242,13 @@ def main():
     # 1. Setup/Verify Directories
     os.makedirs("data", exist_ok=True)
 
-    # 2. Sequence of Operations
-    steps = [
-        ("1_Model_Development/data_prep/generate_synthetic_data.py", "Generating 15k Synthetic Orders"),
-        ("1_Model_Development/offline_pipeline/build_graph.py", "Building regional Knowledge Graph"),
-        ("1_Model_Development/offline_pipeline/train_ranker.py", "Training Two-Stage ML Ranker"),
-        ("2_Evaluation_Results/metrics.py", "Running Performance Evaluation")
-    ]
-
-    for script, desc in steps:
-        if not run_step(script, desc):
-            sys.exit(1)
+    # 2. Dependency-ordered execution with caching
+    pipeline_start = time.perf_counter()
+    results, ok = run_pipeline(force=args.force, jobs=args.jobs)
+    print_timings(results)
+    print(f"  Total wall time: {time.perf_counter() - pipeline_start:.2f}s")
+    if not ok:
+        sys.exit(1)
 
     print("\n====================================================")
     print("🎉 FULL PIPELINE COMPLETE!")